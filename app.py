@@ -1,21 +1,74 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import json
 import os
 import csv
 import time
+import itertools
+import bisect
+import heapq
 import re
 import hashlib
+import hmac
 import secrets
 import sqlite3
 import threading
+import queue
+import atexit
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 import requests
-from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 import os
 from dotenv import load_dotenv
-from functools import wraps
+from functools import lru_cache, wraps
+from operator import itemgetter
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+# orjson is optional; the stdlib json module is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def json_dumpb(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    json_loads = orjson.loads
+else:
+    json_dumps = json.dumps
+    
+    def json_dumpb(obj) -> bytes:
+        return json.dumps(obj).encode()
+    
+    json_loads = json.loads
+
+# Stored JSON columns are embedded in responses verbatim when orjson supports
+# fragments (3.9+), and parsed otherwise
+json_fragment = getattr(orjson, 'Fragment', None) or json_loads
+
+# psutil is optional; memory usage is reported as 0 without it
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Serialized empty dict, stored for the common no-metadata case
+EMPTY_JSON = '{}'
+
+# Response body of a doctor search with an empty query
+EMPTY_DOCTORS_JSON = b'{"doctors":[]}'
+
+# Explicit datetime adapter in place of sqlite3's deprecated default one
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(sep=' '))
 
 # Base directory for the application
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -36,272 +89,600 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-admin-key-change-in-production')
 
+if orjson is not None:
+    class OrjsonJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider that serializes with orjson"""
+        
+        def _dumpb(self, obj, indent: bool = False) -> bytes:
+            # Dates still go through Flask's default() so responses keep
+            # their HTTP date format
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option)
+        
+        def dumps(self, obj, **kwargs) -> str:
+            return self._dumpb(obj, bool(kwargs.get('indent'))).decode()
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+        
+        def response(self, *args, **kwargs) -> Response:
+            # orjson's bytes become the body directly, without the str
+            # round trip of DefaultJSONProvider.response
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            return self._app.response_class(self._dumpb(obj, indent) + b"\n", mimetype=self.mimetype)
+    
+    app.json = OrjsonJSONProvider(app)
+
+# Medication-related patterns used to redact clinical reports, compiled once
+# into a single alternation so each sentence is scanned in one pass.
+# Patterns are unanchored since they are only used with search().
+MEDICATION_PATTERNS = [
+    # English patterns - broader but still targeted
+    r'\b(recommend|suggest|consider|prescribe|start|begin|initiate|try)\s+.*?\b(medication|medicine|drug|antidepressant|antianxiety|SSRI|SNRI|benzodiazepine|antipsychotic)\b',
+    r'\b(sertraline|fluoxetine|escitalopram|paroxetine|citalopram|venlafaxine|duloxetine|bupropion|mirtazapine|trazodone|lorazepam|alprazolam|clonazepam|diazepam|buspirone|quetiapine|aripiprazole|risperidone|olanzapine|lamotrigine|valproate|carbamazepine)\b',
+    r'\b(mg|milligrams|dose|dosage|daily|twice|morning|evening)\s+.*?\b(medication|medicine|drug)\b',
+    r'\bmedicinal\s+treatment\b',
+    r'\bpharmacological\s+(intervention|treatment)\b',
+
+    # Chinese patterns - broader coverage
+    r'\b(建議|推薦|考慮|處方|開始|嘗試)\s+.*?\b(藥物|藥品|處方|抗憂鬱劑|抗焦慮劑|苯二氮平類|抗精神病藥)\b',
+    r'\b(舍曲林|氟西汀|艾司西酞普蘭|帕羅西汀|西酞普蘭|文拉法辛|度洛西汀|安非他酮|米氮平|勞拉西泮|阿普唑侖|氯硝西泮|地西泮|丁螺環酮)\b',
+    r'\b(毫克|劑量|每日|每天|早上|晚上)\s+.*?\b(藥物|藥品)\b',
+    r'\b藥物治療\b',
+    r'\b藥理學.*?(干預|治療)\b'
+]
+
+MEDICATION_RE = re.compile(
+    '|'.join(f'(?:{pattern})' for pattern in MEDICATION_PATTERNS),
+    re.IGNORECASE
+)
+
+# Literal terms at least one of which must appear for MEDICATION_RE to match.
+# Checked first so most sentences never reach the regex engine.
+MEDICATION_LITERALS = (
+    'medic', 'drug', 'antidepressant', 'antianxiety', 'ssri', 'snri',
+    'benzodiazepine', 'antipsychotic', 'pharmacological',
+    'sertraline', 'fluoxetine', 'escitalopram', 'paroxetine', 'citalopram',
+    'venlafaxine', 'duloxetine', 'bupropion', 'mirtazapine', 'trazodone',
+    'lorazepam', 'alprazolam', 'clonazepam', 'diazepam', 'buspirone',
+    'quetiapine', 'aripiprazole', 'risperidone', 'olanzapine', 'lamotrigine',
+    'valproate', 'carbamazepine',
+    '藥物', '藥品', '處方', '抗憂鬱劑', '抗焦慮劑', '苯二氮平類', '抗精神病藥', '藥理學',
+    '舍曲林', '氟西汀', '艾司西酞普蘭', '帕羅西汀', '西酞普蘭', '文拉法辛', '度洛西汀',
+    '安非他酮', '米氮平', '勞拉西泮', '阿普唑侖', '氯硝西泮', '地西泮', '丁螺環酮'
+)
+
+REDACTED_MSG_EN = "[Medication-related recommendations redacted - Please consult a qualified physician for medication advice]"
+REDACTED_MSG_ZH = "[藥物相關建議已隱藏 - 請諮詢合格醫師獲得藥物治療建議]"
+
+# Splits a report into sentences, keeping the '.' / newline delimiters
+SENTENCE_SPLIT_RE = re.compile(r'([.\n])')
+
+# Cached reports are returned for repeated assessments, so their redacted
+# versions are memoized as well
+@lru_cache(maxsize=128)
 def filter_medication_recommendations(report: str, language: str = 'en') -> str:
     """Filter out medication recommendations from clinical reports for safety"""
     
-    # Comprehensive medication-related patterns
-    medication_patterns = [
-        # English patterns - broader but still targeted
-        r'.*\b(recommend|suggest|consider|prescribe|start|begin|initiate|try)\s+.*?\b(medication|medicine|drug|antidepressant|antianxiety|SSRI|SNRI|benzodiazepine|antipsychotic)\b.*',
-        r'.*\b(sertraline|fluoxetine|escitalopram|paroxetine|citalopram|venlafaxine|duloxetine|bupropion|mirtazapine|trazodone|lorazepam|alprazolam|clonazepam|diazepam|buspirone|quetiapine|aripiprazole|risperidone|olanzapine|lamotrigine|valproate|carbamazepine)\b.*',
-        r'.*\b(mg|milligrams|dose|dosage|daily|twice|morning|evening)\s+.*\b(medication|medicine|drug)\b.*',
-        r'.*\bmedicinal\s+treatment\b.*',
-        r'.*\bpharmacological\s+(intervention|treatment)\b.*',
-        
-        # Chinese patterns - broader coverage
-        r'.*\b(建議|推薦|考慮|處方|開始|嘗試)\s+.*?\b(藥物|藥品|處方|抗憂鬱劑|抗焦慮劑|苯二氮平類|抗精神病藥)\b.*',
-        r'.*\b(舍曲林|氟西汀|艾司西酞普蘭|帕羅西汀|西酞普蘭|文拉法辛|度洛西汀|安非他酮|米氮平|勞拉西泮|阿普唑侖|氯硝西泮|地西泮|丁螺環酮)\b.*',
-        r'.*\b(毫克|劑量|每日|每天|早上|晚上)\s+.*?\b(藥物|藥品)\b.*',
-        r'.*\b藥物治療\b.*',
-        r'.*\b藥理學.*?(干預|治療)\b.*'
-    ]
-    
-    # Split report into sentences and paragraphs
-    sentences = []
-    for paragraph in report.split('\n'):
-        sentences.extend(paragraph.split('.'))
-    
-    filtered_sentences = []
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
+    # Most reports mention no medication at all; skip the sentence scan
+    report_lower = report.lower()
+    if not any(term in report_lower for term in MEDICATION_LITERALS):
+        return report
+    
+    redacted_msg = REDACTED_MSG_ZH if language == 'zh' else REDACTED_MSG_EN
+    
+    # Alternating sentence / delimiter parts, so the original formatting
+    # can be rebuilt from slices of the report
+    parts = SENTENCE_SPLIT_RE.split(report)
+    parts.append('')
+    
+    filtered_parts = []
+    last_redacted = False
+    
+    for i in range(0, len(parts) - 1, 2):
+        sentence, delimiter = parts[i], parts[i + 1]
+        stripped = sentence.strip()
+        if not stripped:
+            filtered_parts.append(sentence)
+            filtered_parts.append(delimiter)
             continue
-            
-        # Check if sentence contains medication-related content
-        contains_medication = False
-        
-        for pattern in medication_patterns:
-            if re.search(pattern, sentence, re.IGNORECASE | re.DOTALL):
-                contains_medication = True
-                break
         
-        if contains_medication:
-            # Replace with redacted message
-            if language == 'zh':
-                redacted_msg = "[藥物相關建議已隱藏 - 請諮詢合格醫師獲得藥物治療建議]"
-            else:
-                redacted_msg = "[Medication-related recommendations redacted - Please consult a qualified physician for medication advice]"
-            filtered_sentences.append(redacted_msg)
+        # Check if sentence contains medication-related content
+        sentence_lower = stripped.lower()
+        if (any(term in sentence_lower for term in MEDICATION_LITERALS)
+                and MEDICATION_RE.search(stripped)):
+            # Replace with redacted message, collapsing consecutive ones
+            if not last_redacted:
+                filtered_parts.append(sentence[:len(sentence) - len(sentence.lstrip())])
+                filtered_parts.append(redacted_msg)
+                filtered_parts.append(delimiter)
+            elif delimiter == '\n':
+                filtered_parts.append(delimiter)
+            last_redacted = True
         else:
-            filtered_sentences.append(sentence)
+            filtered_parts.append(sentence)
+            filtered_parts.append(delimiter)
+            last_redacted = False
     
-    # Rejoin sentences, handling newlines properly
-    result = '. '.join(filtered_sentences)
+    return ''.join(filtered_parts)
+
+def rows_to_dicts(cursor: sqlite3.Cursor) -> List[Dict]:
+    """Read the remaining rows of a cursor as dicts keyed by column name"""
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that goes back to its pool when closed"""
     
-    # Clean up multiple consecutive redaction messages
-    if language == 'zh':
-        result = re.sub(r'(\[藥物相關建議已隱藏[^\]]+\]\.\s*){2,}', '[藥物相關建議已隱藏 - 請諮詢合格醫師獲得藥物治療建議]. ', result)
-    else:
-        result = re.sub(r'(\[Medication-related recommendations redacted[^\]]+\]\.\s*){2,}', '[Medication-related recommendations redacted - Please consult a qualified physician for medication advice]. ', result)
+    pool = None
     
-    return result
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if self.in_transaction:
+                self.rollback()
+            self.pool.put_nowait(self)
+        except (queue.Full, sqlite3.ProgrammingError):
+            self.pool = None
+            super().close()
 
 class DatabaseManager:
     """SQLite database manager for PsyFind"""
     
-    def __init__(self, db_path: str = None):
+    # Buffered system events are flushed once this many are pending (checked
+    # when an event is logged) or, by the background writer thread, once
+    # this many seconds have passed since the last flush
+    EVENT_FLUSH_ROWS = 50
+    EVENT_FLUSH_INTERVAL = 0.25
+    
+    # Rows fetched per round trip when streaming large result sets
+    FETCH_BATCH_SIZE = 200
+    
+    # Sessions expired per write transaction when cleaning up
+    CLEANUP_BATCH_SIZE = 1000
+    
+    # Seconds the active doctor list is served from memory
+    DOCTORS_CACHE_TTL = 60
+    
+    # Writes waiting for the background writer before callers write inline
+    WRITE_QUEUE_SIZE = 10000
+    
+    # Prepared statements kept per pooled connection (sqlite3 default is 100)
+    STATEMENT_CACHE_SIZE = 256
+    
+    def __init__(self, db_path: str = None, pool_size: int = 8):
         # Use absolute path based on BASE_DIR to ensure consistent location
         if db_path is None:
             db_path = os.path.join(BASE_DIR, 'psyfind.db')
         self.db_path = db_path
-        self.lock = threading.Lock()
+        # Idle connections, reused instead of reconnecting on every call
+        self._pool = queue.Queue(maxsize=pool_size)
+        # System events are buffered and written in batches
+        self._event_buffer = []
+        self._event_buffer_lock = threading.Lock()
+        self._last_event_flush = time.monotonic()
+        self._event_flush_queued = False
+        # (loaded_at, doctors, serialized response or None) for the active doctors
+        self._doctors_cache = None
+        self._doctors_cache_lock = threading.Lock()
+        # (method, args, kwargs) writes taken off the request thread
+        self._write_queue = queue.Queue(maxsize=self.WRITE_QUEUE_SIZE)
         self.init_database()
+        threading.Thread(target=self._run_background_writes, name='db-writer', daemon=True).start()
+        # atexit runs handlers in reverse, so queued writes finish and
+        # buffered events are flushed before the pooled connections close
+        atexit.register(self.close_pool)
+        atexit.register(self.flush_system_events)
+        atexit.register(self._write_queue.join)
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection with proper settings"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        """Get a pooled database connection; close() returns it to the pool"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=PooledConnection,
+                               cached_statements=self.STATEMENT_CACHE_SIZE)
         conn.row_factory = sqlite3.Row
+        # Writers wait on SQLite's own lock instead of an application lock
+        conn.execute("PRAGMA busy_timeout = 5000")
         conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -16000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.pool = self._pool
         return conn
     
+    def queue_write(self, method: Callable, *args, **kwargs):
+        """Run a write method on the background writer, or inline if it is backed up"""
+        try:
+            self._write_queue.put_nowait((method, args, kwargs))
+        except queue.Full:
+            method(*args, **kwargs)
+    
+    def _run_background_writes(self):
+        """Background writer loop for queue_write, also flushing buffered system events"""
+        while True:
+            try:
+                method, args, kwargs = self._write_queue.get(timeout=self.EVENT_FLUSH_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                try:
+                    method(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"Background write error: {str(e)}")
+                finally:
+                    self._write_queue.task_done()
+            
+            # Events logged just before a quiet period are written here
+            # instead of waiting for the next log_system_event call
+            if self._event_flush_due():
+                try:
+                    self.flush_system_events()
+                except Exception as e:
+                    logger.error(f"Background write error: {str(e)}")
+    
+    def close_pool(self):
+        """Close every idle pooled connection"""
+        optimized = False
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            # Let SQLite refresh planner statistics for the tables it saw
+            # queried, as recommended before closing long-lived connections
+            if not optimized:
+                try:
+                    conn.execute('PRAGMA optimize')
+                except sqlite3.Error as e:
+                    logger.warning(f"PRAGMA optimize failed: {str(e)}")
+                optimized = True
+            conn.pool = None
+            conn.close()
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, returned to the pool even if the caller raises"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run several writes on one pooled connection with a single commit"""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     def init_database(self):
         """Initialize database with all required tables"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                # User sessions table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS user_sessions (
-                        session_id TEXT PRIMARY KEY,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        language TEXT DEFAULT 'en',
-                        message_count INTEGER DEFAULT 0,
-                        conversation_stage TEXT DEFAULT 'initial',
-                        user_info TEXT DEFAULT '{}',
-                        is_active BOOLEAN DEFAULT 1
-                    )
-                ''')
-                
-                # Chat messages table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS chat_messages (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT,
-                        role TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        metadata TEXT DEFAULT '{}',
-                        FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
-                    )
-                ''')
-                
-                # Assessment results table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS assessment_results (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT,
-                        assessment_type TEXT NOT NULL,
-                        responses TEXT NOT NULL,
-                        score INTEGER,
-                        severity TEXT,
-                        interpretation TEXT,
-                        dsm_analysis TEXT,
-                        clinical_report TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
-                    )
-                ''')
-                
-                # Admin sessions table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS admin_sessions (
-                        session_id TEXT PRIMARY KEY,
-                        username TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        permissions TEXT NOT NULL,
-                        is_active BOOLEAN DEFAULT 1
-                    )
-                ''')
-                
-                # System analytics table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS system_analytics (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT NOT NULL,
-                        total_sessions INTEGER DEFAULT 0,
-                        total_assessments INTEGER DEFAULT 0,
-                        assessment_types TEXT DEFAULT '{}',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(date)
-                    )
-                ''')
-                
-                # System events table for logging
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS system_events (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        event_type TEXT NOT NULL,
-                        event_data TEXT,
-                        session_id TEXT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+        conn = self.get_connection()
+        try:
+            # WAL lets readers proceed during writes and avoids an fsync per commit
+            conn.execute("PRAGMA journal_mode = WAL")
+            
+            # User sessions table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    language TEXT DEFAULT 'en',
+                    message_count INTEGER DEFAULT 0,
+                    conversation_stage TEXT DEFAULT 'initial',
+                    user_info TEXT DEFAULT '{}',
+                    is_active BOOLEAN DEFAULT 1
+                )
+            ''')
+            
+            # Create index for active session listings
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_user_sessions_active
+                ON user_sessions(is_active, last_activity)
+            ''')
+            
+            # Create index for date-range session reports
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_user_sessions_created
+                ON user_sessions(created_at)
+            ''')
+            
+            # Chat messages table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    metadata TEXT DEFAULT '{}',
+                    FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
+                )
+            ''')
+            
+            # Create index for faster chat history queries
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_chat_messages_session
+                ON chat_messages(session_id, timestamp)
+            ''')
+            
+            # Assessment results table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS assessment_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT,
+                    assessment_type TEXT NOT NULL,
+                    responses TEXT NOT NULL,
+                    score INTEGER,
+                    severity TEXT,
+                    interpretation TEXT,
+                    dsm_analysis TEXT,
+                    clinical_report TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
+                )
+            ''')
+            
+            # Create indexes for per-session listings and per-type statistics;
+            # the session index also orders a session's results by date, so it
+            # replaces the older single-column one
+            conn.execute('DROP INDEX IF EXISTS idx_assessment_results_session')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessment_results_session_created
+                ON assessment_results(session_id, created_at)
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessment_results_type
+                ON assessment_results(assessment_type, created_at)
+            ''')
+            
+            # Recent/date-range listings and the per-type severity distribution
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessment_results_created
+                ON assessment_results(created_at, assessment_type)
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessment_results_severity
+                ON assessment_results(assessment_type, severity)
+            ''')
+            
+            # Admin sessions table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS admin_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    permissions TEXT NOT NULL,
+                    is_active BOOLEAN DEFAULT 1
+                )
+            ''')
+            
+            # System analytics table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS system_analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    total_sessions INTEGER DEFAULT 0,
+                    total_assessments INTEGER DEFAULT 0,
+                    assessment_types TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(date)
+                )
+            ''')
+            
+            # System events table for logging
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS system_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_type TEXT NOT NULL,
+                    event_data TEXT,
+                    session_id TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Create index for filtered event log queries
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_system_events_type
+                ON system_events(event_type, timestamp)
+            ''')
+            
+            # Create index for the unfiltered newest-first event log
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_system_events_timestamp
+                ON system_events(timestamp)
+            ''')
 
-                # Mood tracking table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS mood_tracking (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT NOT NULL,
-                        mood_type TEXT NOT NULL,
-                        note TEXT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
-                    )
-                ''')
+            # Mood tracking table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS mood_tracking (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    mood_type TEXT NOT NULL,
+                    note TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES user_sessions (session_id)
+                )
+            ''')
 
-                # Create index for faster mood history queries
-                conn.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_mood_tracking_session
-                    ON mood_tracking(session_id, timestamp)
-                ''')
+            # Create index for faster mood history queries
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_mood_tracking_session
+                ON mood_tracking(session_id, timestamp)
+            ''')
 
-                # Session exchange tracking table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS session_exchange (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        from_session_id TEXT NOT NULL,
-                        to_session_id TEXT NOT NULL,
-                        exchange_type TEXT NOT NULL,
-                        exchange_data TEXT DEFAULT '{}',
-                        reason TEXT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (from_session_id) REFERENCES user_sessions (session_id),
-                        FOREIGN KEY (to_session_id) REFERENCES user_sessions (session_id)
-                    )
-                ''')
+            # Session exchange tracking table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS session_exchange (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    from_session_id TEXT NOT NULL,
+                    to_session_id TEXT NOT NULL,
+                    exchange_type TEXT NOT NULL,
+                    exchange_data TEXT DEFAULT '{}',
+                    reason TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (from_session_id) REFERENCES user_sessions (session_id),
+                    FOREIGN KEY (to_session_id) REFERENCES user_sessions (session_id)
+                )
+            ''')
 
-                # Create index for faster session exchange queries
-                conn.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_session_exchange_from
-                    ON session_exchange(from_session_id, timestamp)
-                ''')
+            # Create index for faster session exchange queries
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_session_exchange_from
+                ON session_exchange(from_session_id, timestamp)
+            ''')
 
-                conn.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_session_exchange_to
-                    ON session_exchange(to_session_id, timestamp)
-                ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_session_exchange_to
+                ON session_exchange(to_session_id, timestamp)
+            ''')
 
-                # Doctors/Psychiatrists table
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS doctors (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL,
-                        specialty TEXT NOT NULL,
-                        subspecialty TEXT,
-                        approach TEXT,
-                        phone TEXT,
-                        email TEXT,
-                        location TEXT,
-                        languages TEXT NOT NULL,
-                        experience TEXT,
-                        education TEXT,
-                        certifications TEXT,
-                        availability TEXT,
-                        consultation_fee TEXT,
-                        notes TEXT,
-                        is_active BOOLEAN DEFAULT 1,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                conn.commit()
-                logger.info("Database initialized successfully")
-                
-            except Exception as e:
-                logger.error(f"Database initialization error: {str(e)}")
-                conn.rollback()
-            finally:
-                conn.close()
+            # Doctors/Psychiatrists table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS doctors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    specialty TEXT NOT NULL,
+                    subspecialty TEXT,
+                    approach TEXT,
+                    phone TEXT,
+                    email TEXT,
+                    location TEXT,
+                    languages TEXT NOT NULL,
+                    experience TEXT,
+                    education TEXT,
+                    certifications TEXT,
+                    availability TEXT,
+                    consultation_fee TEXT,
+                    notes TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            self._init_doctor_search_index(conn)
+            
+            # Key/value bookkeeping, e.g. the hash of the last imported CSV
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            
+            conn.commit()
+            logger.info("Database initialized successfully")
+            
+        except Exception as e:
+            logger.error(f"Database initialization error: {str(e)}")
+            conn.rollback()
+        finally:
+            conn.close()
+    
+    def _init_doctor_search_index(self, conn: sqlite3.Connection):
+        """Create the FTS5 trigram index used by search_doctors"""
+        self.doctor_fts_enabled = False
+        try:
+            exists = conn.execute('''
+                SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'doctors_fts'
+            ''').fetchone()
+            
+            # Trigram tokens keep the substring semantics of the old LIKE '%q%' search
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5(
+                    name, specialty, subspecialty, location,
+                    content='doctors', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+            
+            # Keep the index in sync with the doctors table
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS doctors_fts_insert AFTER INSERT ON doctors BEGIN
+                    INSERT INTO doctors_fts (rowid, name, specialty, subspecialty, location)
+                    VALUES (new.id, new.name, new.specialty, new.subspecialty, new.location);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS doctors_fts_delete AFTER DELETE ON doctors BEGIN
+                    INSERT INTO doctors_fts (doctors_fts, rowid, name, specialty, subspecialty, location)
+                    VALUES ('delete', old.id, old.name, old.specialty, old.subspecialty, old.location);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS doctors_fts_update AFTER UPDATE ON doctors BEGIN
+                    INSERT INTO doctors_fts (doctors_fts, rowid, name, specialty, subspecialty, location)
+                    VALUES ('delete', old.id, old.name, old.specialty, old.subspecialty, old.location);
+                    INSERT INTO doctors_fts (rowid, name, specialty, subspecialty, location)
+                    VALUES (new.id, new.name, new.specialty, new.subspecialty, new.location);
+                END
+            ''')
+            
+            # Index doctors that existed before the FTS table was added
+            if not exists:
+                conn.execute("INSERT INTO doctors_fts (doctors_fts) VALUES ('rebuild')")
+            
+            self.doctor_fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 trigram search unavailable, using LIKE search: {str(e)}")
     
     # User Session Management
     def create_user_session(self, session_id: str, language: str = 'en') -> bool:
         """Create a new user session"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT OR REPLACE INTO user_sessions 
-                    (session_id, language, created_at, last_activity) 
-                    VALUES (?, ?, ?, ?)
-                ''', (session_id, language, datetime.now(), datetime.now()))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error creating user session: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            # Reactivating a known session id keeps its row (and created_at)
+            # but starts the conversation state over
+            conn.execute('''
+                INSERT INTO user_sessions (session_id, language) 
+                VALUES (?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET 
+                    language = excluded.language,
+                    last_activity = CURRENT_TIMESTAMP,
+                    message_count = 0,
+                    conversation_stage = 'initial',
+                    user_info = '{}',
+                    is_active = 1
+            ''', (session_id, language))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error creating user session: {str(e)}")
+            return False
+        finally:
+            conn.close()
     
     def get_user_session(self, session_id: str) -> Optional[Dict]:
-        """Get user session data"""
+        """Get user session data, with timestamps also as epoch seconds"""
         conn = self.get_connection()
         try:
             cursor = conn.execute('''
-                SELECT * FROM user_sessions WHERE session_id = ? AND is_active = 1
+                SELECT *, 
+                       CAST(strftime('%s', created_at) AS INTEGER) AS created_at_epoch,
+                       CAST(strftime('%s', last_activity) AS INTEGER) AS last_activity_epoch
+                FROM user_sessions WHERE session_id = ? AND is_active = 1
             ''', (session_id,))
             row = cursor.fetchone()
             if row:
@@ -313,32 +694,34 @@ class DatabaseManager:
     def update_session_activity(self, session_id: str, message_count: int = None, 
                               conversation_stage: str = None) -> bool:
         """Update session activity"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                updates = ['last_activity = ?']
-                params = [datetime.now()]
-                
-                if message_count is not None:
-                    updates.append('message_count = ?')
-                    params.append(message_count)
-                
-                if conversation_stage is not None:
-                    updates.append('conversation_stage = ?')
-                    params.append(conversation_stage)
-                
-                params.append(session_id)
-                
-                conn.execute(f'''
-                    UPDATE user_sessions SET {', '.join(updates)} WHERE session_id = ?
-                ''', params)
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error updating session activity: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        try:
+            with self.transaction() as conn:
+                self._touch_session(conn, session_id, message_count, conversation_stage)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating session activity: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _touch_session(conn: sqlite3.Connection, session_id: str, message_count: int = None,
+                       conversation_stage: str = None):
+        """Update session activity on the caller's connection"""
+        updates = ['last_activity = CURRENT_TIMESTAMP']
+        params = []
+        
+        if message_count is not None:
+            updates.append('message_count = ?')
+            params.append(message_count)
+        
+        if conversation_stage is not None:
+            updates.append('conversation_stage = ?')
+            params.append(conversation_stage)
+        
+        params.append(session_id)
+        
+        conn.execute(f'''
+            UPDATE user_sessions SET {', '.join(updates)} WHERE session_id = ?
+        ''', params)
     
     def get_active_sessions(self, limit: int = 100) -> List[Dict]:
         """Get active user sessions"""
@@ -352,85 +735,175 @@ class DatabaseManager:
                 ORDER BY last_activity DESC 
                 LIMIT ?
             ''', (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            return rows_to_dicts(cursor)
+        finally:
+            conn.close()
+    
+    def get_active_sessions_page(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Get one page of active user sessions as admin listing rows"""
+        conn = self.get_connection()
+        try:
+            # The truncated display ID is built in SQL with the rest of the row
+            cursor = conn.execute('''
+                SELECT session_id, SUBSTR(session_id, 1, 16) || '...' AS display_id,
+                       created_at, last_activity, message_count, language, conversation_stage
+                FROM user_sessions 
+                WHERE is_active = 1 
+                ORDER BY last_activity DESC 
+                LIMIT ? OFFSET ?
+            ''', (limit, offset))
+            return rows_to_dicts(cursor)
+        finally:
+            conn.close()
+    
+    def get_session_by_prefix(self, prefix: str) -> Optional[str]:
+        """Resolve a truncated session ID to the full ID of an active session"""
+        # Session IDs never contain GLOB wildcards, so a prefix with one can't match
+        if not prefix or any(char in prefix for char in '*?['):
+            return None
+        conn = self.get_connection()
+        try:
+            # A prefix GLOB is served by the primary key index as a range scan;
+            # the unary + keeps the planner off the is_active index
+            cursor = conn.execute('''
+                SELECT session_id FROM user_sessions
+                WHERE session_id GLOB ? AND +is_active = 1
+                LIMIT 1
+            ''', (prefix + '*',))
+            row = cursor.fetchone()
+            return row['session_id'] if row else None
         finally:
             conn.close()
     
+    def mark_session_inactive(self, session_id: str) -> bool:
+        """Deactivate a single active user session"""
+        try:
+            with self.transaction() as conn:
+                cursor = conn.execute('''
+                    UPDATE user_sessions SET is_active = 0 WHERE session_id = ? AND is_active = 1
+                ''', (session_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error deactivating session: {str(e)}")
+            return False
+    
     def cleanup_expired_sessions(self, timeout_hours: int = 1) -> int:
         """Cleanup expired sessions"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                cutoff_time = datetime.now() - timedelta(hours=timeout_hours)
+        conn = self.get_connection()
+        try:
+            # Expire in batches so a large backlog doesn't hold the write lock
+            cleaned = 0
+            while True:
                 cursor = conn.execute('''
                     UPDATE user_sessions 
                     SET is_active = 0 
-                    WHERE last_activity < ? AND is_active = 1
-                ''', (cutoff_time,))
+                    WHERE rowid IN (
+                        SELECT rowid FROM user_sessions 
+                        WHERE last_activity < datetime('now', ?) AND is_active = 1 
+                        LIMIT ?
+                    )
+                ''', (f'-{timeout_hours} hours', self.CLEANUP_BATCH_SIZE))
                 conn.commit()
-                return cursor.rowcount
-            except Exception as e:
-                logger.error(f"Error cleaning up sessions: {str(e)}")
-                return 0
-            finally:
-                conn.close()
+                cleaned += cursor.rowcount
+                if cursor.rowcount < self.CLEANUP_BATCH_SIZE:
+                    return cleaned
+        except Exception as e:
+            logger.error(f"Error cleaning up sessions: {str(e)}")
+            return 0
+        finally:
+            conn.close()
     
     # Chat Message Management
     def add_chat_message(self, session_id: str, role: str, content: str, 
-                        metadata: Dict = None) -> bool:
-        """Add chat message to database"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
+                        metadata: Dict = None, message_count: int = None,
+                        conversation_stage: str = None) -> bool:
+        """Add chat message to database, updating the session in the same commit"""
+        try:
+            with self.transaction() as conn:
                 conn.execute('''
                     INSERT INTO chat_messages (session_id, role, content, metadata)
                     VALUES (?, ?, ?, ?)
-                ''', (session_id, role, content, json.dumps(metadata or {})))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error adding chat message: {str(e)}")
-                return False
-            finally:
-                conn.close()
+                ''', (session_id, role, content, json_dumps(metadata) if metadata else EMPTY_JSON))
+                if message_count is not None or conversation_stage is not None:
+                    self._touch_session(conn, session_id, message_count, conversation_stage)
+            return True
+        except Exception as e:
+            logger.error(f"Error adding chat message: {str(e)}")
+            return False
+    
+    def commit_chat_turn(self, session_id: str, user_message: str, assistant_message: str,
+                         metadata: Dict = None, message_count: int = None,
+                         conversation_stage: str = None) -> bool:
+        """Store a user message and its reply and update the session in one commit"""
+        try:
+            with self.transaction() as conn:
+                conn.executemany('''
+                    INSERT INTO chat_messages (session_id, role, content, metadata)
+                    VALUES (?, ?, ?, ?)
+                ''', [
+                    (session_id, 'user', user_message, EMPTY_JSON),
+                    (session_id, 'assistant', assistant_message,
+                     json_dumps(metadata) if metadata else EMPTY_JSON)
+                ])
+                self._touch_session(conn, session_id, message_count, conversation_stage)
+            return True
+        except Exception as e:
+            logger.error(f"Error committing chat turn: {str(e)}")
+            return False
     
     def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict]:
         """Get chat history for a session"""
         conn = self.get_connection()
+        try:
+            # Take the latest messages, returned in chronological order
+            cursor = conn.execute('''
+                SELECT role, content, timestamp, metadata FROM (
+                    SELECT id, role, content, timestamp, metadata
+                    FROM chat_messages 
+                    WHERE session_id = ? 
+                    ORDER BY timestamp DESC, id DESC 
+                    LIMIT ?
+                )
+                ORDER BY timestamp ASC, id ASC
+            ''', (session_id, limit))
+            messages = rows_to_dicts(cursor)
+            for msg in messages:
+                msg['metadata'] = json_loads(msg['metadata'])
+            return messages
+        finally:
+            conn.close()
+    
+    def get_recent_dialog(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """Get the latest user/assistant messages of a session in chronological order"""
+        conn = self.get_connection()
         try:
             cursor = conn.execute('''
-                SELECT role, content, timestamp, metadata
-                FROM chat_messages 
-                WHERE session_id = ? 
-                ORDER BY timestamp DESC 
+                SELECT role, content
+                FROM chat_messages
+                WHERE session_id = ? AND role IN ('user', 'assistant')
+                ORDER BY timestamp DESC, id DESC
                 LIMIT ?
             ''', (session_id, limit))
-            messages = []
-            for row in cursor.fetchall():
-                msg = dict(row)
-                msg['metadata'] = json.loads(msg['metadata'])
-                messages.append(msg)
-            return list(reversed(messages))  # Return in chronological order
+            return [dict(row) for row in reversed(cursor.fetchall())]
         finally:
             conn.close()
 
     # Mood Tracking Management
     def record_mood(self, session_id: str, mood_type: str, note: str = None) -> bool:
         """Record a mood entry for a session"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT INTO mood_tracking (session_id, mood_type, note)
-                    VALUES (?, ?, ?)
-                ''', (session_id, mood_type, note))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error recording mood: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO mood_tracking (session_id, mood_type, note)
+                VALUES (?, ?, ?)
+            ''', (session_id, mood_type, note))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error recording mood: {str(e)}")
+            return False
+        finally:
+            conn.close()
 
     def get_mood_history(self, session_id: str, days: int = 7) -> List[Dict]:
         """Get mood history for a session within the last N days"""
@@ -442,7 +915,7 @@ class DatabaseManager:
                 WHERE session_id = ? AND timestamp >= datetime('now', ?)
                 ORDER BY timestamp ASC
             ''', (session_id, f'-{days} days'))
-            return [dict(row) for row in cursor.fetchall()]
+            return rows_to_dicts(cursor)
         except Exception as e:
             logger.error(f"Error getting mood history: {str(e)}")
             return []
@@ -570,23 +1043,22 @@ class DatabaseManager:
                                 exchange_type: str, exchange_data: Dict = None,
                                 reason: str = None) -> bool:
         """Record a session exchange/transfer between two sessions"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT INTO session_exchange
-                    (from_session_id, to_session_id, exchange_type, exchange_data, reason)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (from_session_id, to_session_id, exchange_type,
-                      json.dumps(exchange_data or {}), reason))
-                conn.commit()
-                logger.info(f"Session exchange recorded: {from_session_id} -> {to_session_id} ({exchange_type})")
-                return True
-            except Exception as e:
-                logger.error(f"Error recording session exchange: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO session_exchange
+                (from_session_id, to_session_id, exchange_type, exchange_data, reason)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (from_session_id, to_session_id, exchange_type,
+                  json_dumps(exchange_data) if exchange_data else EMPTY_JSON, reason))
+            conn.commit()
+            logger.info(f"Session exchange recorded: {from_session_id} -> {to_session_id} ({exchange_type})")
+            return True
+        except Exception as e:
+            logger.error(f"Error recording session exchange: {str(e)}")
+            return False
+        finally:
+            conn.close()
 
     def get_session_exchanges(self, session_id: str, limit: int = 50) -> List[Dict]:
         """Get all exchanges for a session (both as source and target)"""
@@ -598,11 +1070,9 @@ class DatabaseManager:
                 ORDER BY timestamp DESC
                 LIMIT ?
             ''', (session_id, session_id, limit))
-            exchanges = []
-            for row in cursor.fetchall():
-                exchange = dict(row)
-                exchange['exchange_data'] = json.loads(exchange.get('exchange_data') or '{}')
-                exchanges.append(exchange)
+            exchanges = rows_to_dicts(cursor)
+            for exchange in exchanges:
+                exchange['exchange_data'] = json_loads(exchange.get('exchange_data') or '{}')
             return exchanges
         except Exception as e:
             logger.error(f"Error getting session exchanges: {str(e)}")
@@ -620,11 +1090,9 @@ class DatabaseManager:
                 ORDER BY timestamp DESC
                 LIMIT ?
             ''', (f'-{days} days', limit))
-            exchanges = []
-            for row in cursor.fetchall():
-                exchange = dict(row)
-                exchange['exchange_data'] = json.loads(exchange.get('exchange_data') or '{}')
-                exchanges.append(exchange)
+            exchanges = rows_to_dicts(cursor)
+            for exchange in exchanges:
+                exchange['exchange_data'] = json_loads(exchange.get('exchange_data') or '{}')
             return exchanges
         except Exception as e:
             logger.error(f"Error getting all session exchanges: {str(e)}")
@@ -683,23 +1151,155 @@ class DatabaseManager:
                              interpretation: str, dsm_analysis: List[Dict],
                              clinical_report: str) -> bool:
         """Save assessment results"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT INTO assessment_results 
-                    (session_id, assessment_type, responses, score, severity, 
-                     interpretation, dsm_analysis, clinical_report)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (session_id, assessment_type, json.dumps(responses), score,
-                      severity, interpretation, json.dumps(dsm_analysis), clinical_report))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error saving assessment result: {str(e)}")
-                return False
-            finally:
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO assessment_results 
+                (session_id, assessment_type, responses, score, severity, 
+                 interpretation, dsm_analysis, clinical_report)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (session_id, assessment_type, json_dumps(responses), score,
+                  severity, interpretation, json_dumps(dsm_analysis), clinical_report))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error saving assessment result: {str(e)}")
+            return False
+        finally:
+            conn.close()
+    
+    # Complete chat history (unfiltered) of a session, oldest first
+    CLINICAL_CHAT_SQL = '''
+        SELECT role, content, timestamp, metadata
+        FROM chat_messages
+        WHERE session_id = ?
+        ORDER BY timestamp ASC
+    '''
+    
+    # Assessment results of a session with unredacted clinical reports, newest first
+    CLINICAL_ASSESSMENTS_SQL = '''
+        SELECT assessment_type, score, severity, interpretation,
+               dsm_analysis, clinical_report, responses, created_at
+        FROM assessment_results
+        WHERE session_id = ?
+        ORDER BY created_at DESC
+    '''
+    
+    def get_clinical_session_detail(self, session_id: str) -> Optional[Dict]:
+        """Get a session with its full chat history, assessments and moods (None if unknown)"""
+        with self.connection() as conn:
+            # Get session info
+            cursor = conn.execute('''
+                SELECT * FROM user_sessions WHERE session_id = ?
+            ''', (session_id,))
+            session_info = cursor.fetchone()
+            if not session_info:
+                return None
+            
+            cursor = conn.execute(self.CLINICAL_CHAT_SQL, (session_id,))
+            chat_history = [self._chat_message_row(msg) for msg in rows_to_dicts(cursor)]
+            
+            cursor = conn.execute(self.CLINICAL_ASSESSMENTS_SQL, (session_id,))
+            assessments = [self._clinical_report_row(a) for a in rows_to_dicts(cursor)]
+            
+            # Get mood history
+            cursor = conn.execute('''
+                SELECT mood_type, note, timestamp
+                FROM mood_tracking
+                WHERE session_id = ?
+                ORDER BY timestamp DESC
+            ''', (session_id,))
+            mood_history = rows_to_dicts(cursor)
+        
+        return {
+            "session": dict(session_info),
+            "chat_history": chat_history,
+            "assessments": assessments,
+            "mood_history": mood_history,
+            "total_messages": len(chat_history),
+            "total_assessments": len(assessments),
+            "total_mood_records": len(mood_history)
+        }
+    
+    def iter_clinical_export(self, session_id: str) -> Optional[Tuple[Dict, Iterator[Dict]]]:
+        """Get a session's export summary and an iterator over its chat history (None if unknown)"""
+        conn = self.get_connection()
+        try:
+            # One read snapshot, so the counts match the streamed messages
+            conn.execute('BEGIN')
+            cursor = conn.execute('''
+                SELECT * FROM user_sessions WHERE session_id = ?
+            ''', (session_id,))
+            session_info = cursor.fetchone()
+            if not session_info:
                 conn.close()
+                return None
+            
+            total_messages = conn.execute('''
+                SELECT COUNT(*) FROM chat_messages WHERE session_id = ?
+            ''', (session_id,)).fetchone()[0]
+            
+            cursor = conn.execute(self.CLINICAL_ASSESSMENTS_SQL, (session_id,))
+            assessments = [self._clinical_report_row(a) for a in rows_to_dicts(cursor)]
+            
+            cursor = conn.execute(self.CLINICAL_CHAT_SQL, (session_id,))
+        except Exception:
+            conn.close()
+            raise
+        
+        summary = {
+            "session": dict(session_info),
+            "assessments": assessments,
+            "total_messages": total_messages,
+            "total_assessments": len(assessments)
+        }
+        return summary, self._stream_rows(conn, cursor, self._chat_message_row)
+    
+    @staticmethod
+    def _chat_message_row(message: Dict) -> Dict:
+        """Decode the metadata of a chat message row"""
+        message['metadata'] = json_loads(message['metadata'])
+        return message
+    
+    def iter_clinical_reports_json(self, assessment_type: str = None, limit: int = 100) -> Iterator[str]:
+        """Iterate over unredacted clinical reports as JSON text, newest first, fetching rows in batches"""
+        # SQLite's JSON1 builds each report object, embedding the stored JSON
+        # columns with json() so they are never decoded and re-encoded here
+        query = '''
+            SELECT json_object(
+                'id', ar.id,
+                'session_id', ar.session_id,
+                'assessment_type', ar.assessment_type,
+                'responses', json(ar.responses),
+                'score', ar.score,
+                'severity', ar.severity,
+                'interpretation', ar.interpretation,
+                'dsm_analysis', json(ar.dsm_analysis),
+                'clinical_report', ar.clinical_report,
+                'created_at', ar.created_at,
+                'language', us.language,
+                'session_created', us.created_at
+            ) AS report
+            FROM assessment_results ar
+            JOIN user_sessions us ON ar.session_id = us.session_id
+        '''
+        params = []
+        
+        if assessment_type:
+            query += ' WHERE ar.assessment_type = ?'
+            params.append(assessment_type)
+        
+        query += ' ORDER BY ar.created_at DESC LIMIT ?'
+        params.append(limit)
+        
+        return self._stream_query(query, params, itemgetter('report'))
+    
+    @staticmethod
+    def _clinical_report_row(report: Dict) -> Dict:
+        """Embed the stored JSON columns of a clinical report row"""
+        report['dsm_analysis'] = json_fragment(report['dsm_analysis'])
+        report['responses'] = json_fragment(report['responses'])
+        return report
     
     def get_assessment_stats(self) -> Dict:
         """Get assessment statistics"""
@@ -738,34 +1338,39 @@ class DatabaseManager:
     # Admin Session Management
     def create_admin_session(self, session_id: str, username: str, permissions: List[str]) -> bool:
         """Create admin session"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT OR REPLACE INTO admin_sessions 
-                    (session_id, username, permissions, created_at, last_activity)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (session_id, username, json.dumps(permissions), datetime.now(), datetime.now()))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error creating admin session: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO admin_sessions (session_id, username, permissions)
+                VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET 
+                    username = excluded.username,
+                    permissions = excluded.permissions,
+                    last_activity = CURRENT_TIMESTAMP,
+                    is_active = 1
+            ''', (session_id, username, json_dumps(permissions)))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error creating admin session: {str(e)}")
+            return False
+        finally:
+            conn.close()
     
     def get_admin_session(self, session_id: str) -> Optional[Dict]:
-        """Get admin session"""
+        """Get admin session, with last activity also as epoch seconds"""
         conn = self.get_connection()
         try:
             cursor = conn.execute('''
-                SELECT * FROM admin_sessions 
+                SELECT *,
+                       CAST(strftime('%s', last_activity) AS INTEGER) AS last_activity_epoch
+                FROM admin_sessions 
                 WHERE session_id = ? AND is_active = 1
             ''', (session_id,))
             row = cursor.fetchone()
             if row:
                 session_data = dict(row)
-                session_data['permissions'] = json.loads(session_data['permissions'])
+                session_data['permissions'] = json_loads(session_data['permissions'])
                 return session_data
             return None
         finally:
@@ -773,160 +1378,264 @@ class DatabaseManager:
     
     def update_admin_activity(self, session_id: str) -> bool:
         """Update admin session activity"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    UPDATE admin_sessions 
-                    SET last_activity = ? 
-                    WHERE session_id = ?
-                ''', (datetime.now(), session_id))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error updating admin activity: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                UPDATE admin_sessions 
+                SET last_activity = CURRENT_TIMESTAMP 
+                WHERE session_id = ?
+            ''', (session_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error updating admin activity: {str(e)}")
+            return False
+        finally:
+            conn.close()
     
     def terminate_admin_session(self, session_id: str) -> bool:
         """Terminate admin session"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    UPDATE admin_sessions 
-                    SET is_active = 0 
-                    WHERE session_id = ?
-                ''', (session_id,))
-                conn.commit()
-                return True
-            except Exception as e:
-                logger.error(f"Error terminating admin session: {str(e)}")
-                return False
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                UPDATE admin_sessions 
+                SET is_active = 0 
+                WHERE session_id = ?
+            ''', (session_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error terminating admin session: {str(e)}")
+            return False
+        finally:
+            conn.close()
     
     # Analytics and Events
     def log_system_event(self, event_type: str, event_data: Dict = None, session_id: str = None):
-        """Log system event"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    INSERT INTO system_events (event_type, event_data, session_id)
-                    VALUES (?, ?, ?)
-                ''', (event_type, json.dumps(event_data or {}), session_id))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"Error logging system event: {str(e)}")
-            finally:
-                conn.close()
+        """Log system event (buffered, see flush_system_events)"""
+        event = (event_type, json_dumps(event_data) if event_data else EMPTY_JSON, session_id,
+                 time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()))
+        with self._event_buffer_lock:
+            self._event_buffer.append(event)
+            flush_due = not self._event_flush_queued and (
+                len(self._event_buffer) >= self.EVENT_FLUSH_ROWS or
+                time.monotonic() - self._last_event_flush >= self.EVENT_FLUSH_INTERVAL)
+            if flush_due:
+                self._event_flush_queued = True
+        # The batch insert runs on the background writer, not in the request
+        if flush_due:
+            self.queue_write(self.flush_system_events)
+    
+    def _event_flush_due(self) -> bool:
+        """Whether events are buffered and EVENT_FLUSH_INTERVAL has passed since the last flush"""
+        with self._event_buffer_lock:
+            return bool(self._event_buffer) and (
+                time.monotonic() - self._last_event_flush >= self.EVENT_FLUSH_INTERVAL)
+    
+    def flush_system_events(self):
+        """Write buffered system events in a single transaction"""
+        with self._event_buffer_lock:
+            events, self._event_buffer = self._event_buffer, []
+            self._last_event_flush = time.monotonic()
+            self._event_flush_queued = False
+        if not events:
+            return
+        
+        conn = self.get_connection()
+        try:
+            conn.executemany('''
+                INSERT INTO system_events (event_type, event_data, session_id, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', events)
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error logging system events: {str(e)}")
+        finally:
+            conn.close()
     
     def get_system_stats(self) -> Dict:
-        """Get comprehensive system statistics"""
+        """Get comprehensive system statistics (two queries on one connection)"""
         conn = self.get_connection()
         try:
-            # Active sessions
-            cursor = conn.execute('SELECT COUNT(*) as count FROM user_sessions WHERE is_active = 1')
-            active_sessions = cursor.fetchone()['count']
-            
-            # Total sessions
-            cursor = conn.execute('SELECT COUNT(*) as count FROM user_sessions')
-            total_sessions = cursor.fetchone()['count']
-            
-            # Completed sessions with clinical reports
-            cursor = conn.execute('''
-                SELECT COUNT(DISTINCT s.session_id) as count 
-                FROM user_sessions s
-                INNER JOIN assessment_results ar ON s.session_id = ar.session_id
-                WHERE ar.clinical_report IS NOT NULL AND ar.clinical_report != ''
-            ''')
-            completed_sessions = cursor.fetchone()['count']
+            # Every count in one statement
+            counts = conn.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM user_sessions WHERE is_active = 1) AS active_sessions,
+                    (SELECT COUNT(*) FROM user_sessions) AS total_sessions,
+                    (SELECT COUNT(DISTINCT s.session_id)
+                     FROM user_sessions s
+                     INNER JOIN assessment_results ar ON s.session_id = ar.session_id
+                     WHERE ar.clinical_report IS NOT NULL AND ar.clinical_report != '') AS completed_sessions,
+                    (SELECT COUNT(*) FROM assessment_results
+                     WHERE clinical_report IS NOT NULL AND clinical_report != '') AS total_clinical_reports,
+                    (SELECT COUNT(*) FROM mood_tracking
+                     WHERE timestamp >= datetime('now', '-30 days')) AS total_mood_records,
+                    (SELECT COUNT(*) FROM assessment_results) AS total_assessments
+            ''').fetchone()
             
-            # Total clinical reports generated
+            # Assessment types, daily assessments and mood distribution (both
+            # last 30 days), each row tagged with the breakdown it belongs to
+            breakdowns = {'assessment_types': {}, 'daily_stats': {}, 'mood_distribution': {}}
             cursor = conn.execute('''
-                SELECT COUNT(*) as count FROM assessment_results 
-                WHERE clinical_report IS NOT NULL AND clinical_report != ''
+                SELECT breakdown, key, count FROM (
+                    SELECT 'assessment_types' AS breakdown, assessment_type AS key,
+                           COUNT(*) AS count, 0 AS position
+                    FROM assessment_results 
+                    GROUP BY assessment_type
+                    UNION ALL
+                    SELECT 'daily_stats', DATE(created_at), COUNT(*), 0
+                    FROM assessment_results 
+                    WHERE created_at >= datetime('now', '-30 days')
+                    GROUP BY DATE(created_at)
+                    UNION ALL
+                    SELECT 'mood_distribution', mood_type, COUNT(*), -COUNT(*)
+                    FROM mood_tracking
+                    WHERE timestamp >= datetime('now', '-30 days')
+                    GROUP BY mood_type
+                )
+                ORDER BY breakdown, position, key
             ''')
-            total_clinical_reports = cursor.fetchone()['count']
-            
-            # Assessment stats
-            assessment_stats = self.get_assessment_stats()
-            
-            # Mood stats (last 30 days)
-            mood_stats = self.get_all_mood_stats(days=30)
+            for row in cursor:
+                breakdowns[row['breakdown']][row['key']] = row['count']
             
             return {
-                'active_sessions': active_sessions,
-                'total_sessions': total_sessions,
-                'completed_sessions': completed_sessions,
-                'total_clinical_reports': total_clinical_reports,
-                'total_mood_records': mood_stats['total_mood_records'],
-                'mood_distribution': mood_stats['mood_distribution'],
-                **assessment_stats
+                'active_sessions': counts['active_sessions'],
+                'total_sessions': counts['total_sessions'],
+                'completed_sessions': counts['completed_sessions'],
+                'total_clinical_reports': counts['total_clinical_reports'],
+                'total_mood_records': counts['total_mood_records'],
+                'mood_distribution': breakdowns['mood_distribution'],
+                'total_assessments': counts['total_assessments'],
+                'assessment_types': breakdowns['assessment_types'],
+                'daily_stats': breakdowns['daily_stats']
             }
         finally:
             conn.close()
     
     # Doctor Management
+    # Columns read from the psychiatrists CSV, in _read_doctors_csv's order
+    CSV_DOCTOR_FIELDS = ('name', 'specialty', 'subspecialty', 'approach', 'phone',
+                         'location', 'languages', 'experience')
+    
+    # meta key holding the SHA-256 of the last imported psychiatrists CSV
+    DOCTORS_CSV_HASH_KEY = 'doctors_csv_sha256'
+    
+    INSERT_DOCTOR_SQL = '''
+        INSERT INTO doctors (
+            name, specialty, subspecialty, approach, phone, email, 
+            location, languages, experience, education, certifications,
+            availability, consultation_fee, notes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _doctor_params(doctor_data: Dict) -> Tuple:
+        """Build INSERT_DOCTOR_SQL parameters from a doctor dict"""
+        return (
+            doctor_data.get('name'),
+            doctor_data.get('specialty'),
+            doctor_data.get('subspecialty', ''),
+            doctor_data.get('approach', ''),
+            doctor_data.get('phone', ''),
+            doctor_data.get('email', ''),
+            doctor_data.get('location', ''),
+            json_dumps(doctor_data.get('languages', [])),
+            doctor_data.get('experience', ''),
+            doctor_data.get('education', ''),
+            doctor_data.get('certifications', ''),
+            doctor_data.get('availability', ''),
+            doctor_data.get('consultation_fee', ''),
+            doctor_data.get('notes', '')
+        )
+    
     def create_doctor(self, doctor_data: Dict) -> int:
         """Create a new doctor record"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                cursor = conn.execute('''
-                    INSERT INTO doctors (
-                        name, specialty, subspecialty, approach, phone, email, 
-                        location, languages, experience, education, certifications,
-                        availability, consultation_fee, notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    doctor_data.get('name'),
-                    doctor_data.get('specialty'),
-                    doctor_data.get('subspecialty', ''),
-                    doctor_data.get('approach', ''),
-                    doctor_data.get('phone', ''),
-                    doctor_data.get('email', ''),
-                    doctor_data.get('location', ''),
-                    json.dumps(doctor_data.get('languages', [])),
-                    doctor_data.get('experience', ''),
-                    doctor_data.get('education', ''),
-                    doctor_data.get('certifications', ''),
-                    doctor_data.get('availability', ''),
-                    doctor_data.get('consultation_fee', ''),
-                    doctor_data.get('notes', '')
-                ))
-                conn.commit()
-                return cursor.lastrowid
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(self.INSERT_DOCTOR_SQL, self._doctor_params(doctor_data))
+            conn.commit()
+            self._invalidate_doctors_cache()
+            return cursor.lastrowid
+        finally:
+            conn.close()
     
     def get_doctors(self, active_only: bool = True, limit: int = None) -> List[Dict]:
-        """Get all doctors"""
+        """Get all doctors (active list is cached for DOCTORS_CACHE_TTL seconds)"""
+        if not active_only:
+            return list(self.iter_doctors(active_only, limit))
+        
+        with self._doctors_cache_lock:
+            cache = self._fresh_doctors_cache()
+        
+        doctors = cache[1][:limit] if limit else cache[1]
+        return [dict(doctor) for doctor in doctors]
+    
+    def get_active_doctors_json(self) -> bytes:
+        """{"doctors": [...]} for every active doctor, serialized once per cache refresh"""
+        with self._doctors_cache_lock:
+            cache = self._fresh_doctors_cache()
+            if cache[2] is None:
+                cache = (cache[0], cache[1], json_dumpb({"doctors": cache[1]}))
+                self._doctors_cache = cache
+        return cache[2]
+    
+    def _fresh_doctors_cache(self) -> Tuple[float, List[Dict], Optional[bytes]]:
+        """Return the active doctor cache, reloading it if stale (hold _doctors_cache_lock)"""
+        cache = self._doctors_cache
+        if cache is None or time.monotonic() - cache[0] >= self.DOCTORS_CACHE_TTL:
+            cache = (time.monotonic(), list(self.iter_doctors(active_only=True)), None)
+            self._doctors_cache = cache
+        return cache
+    
+    def _invalidate_doctors_cache(self):
+        """Drop the cached doctor list after a doctor is changed"""
+        with self._doctors_cache_lock:
+            self._doctors_cache = None
+    
+    def iter_doctors(self, active_only: bool = True, limit: int = None) -> Iterator[Dict]:
+        """Iterate over doctors, fetching rows in batches"""
+        query = 'SELECT * FROM doctors'
+        params = []
+        
+        if active_only:
+            query += ' WHERE is_active = 1'
+        
+        query += ' ORDER BY name'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        return self._stream_query(query, params, self._doctor_row)
+    
+    @staticmethod
+    def _doctor_row(doctor: Dict) -> Dict:
+        """Decode the JSON columns of a doctor row"""
+        doctor['languages'] = json_loads(doctor['languages'])
+        return doctor
+    
+    def _stream_query(self, query: str, params: List, convert: Callable[[Dict], object]) -> Iterator:
+        """Run a query and iterate over its converted rows, fetching them in batches"""
+        # Run the query eagerly so errors surface before any rows are streamed
         conn = self.get_connection()
         try:
-            query = 'SELECT * FROM doctors'
-            params = []
-            
-            if active_only:
-                query += ' WHERE is_active = 1'
-            
-            query += ' ORDER BY name'
-            
-            if limit:
-                query += ' LIMIT ?'
-                params.append(limit)
-            
             cursor = conn.execute(query, params)
-            doctors = []
-            
-            for row in cursor.fetchall():
-                doctor = dict(row)
-                doctor['languages'] = json.loads(doctor['languages'])
-                doctors.append(doctor)
-            
-            return doctors
+        except Exception:
+            conn.close()
+            raise
+        return self._stream_rows(conn, cursor, convert)
+    
+    def _stream_rows(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                     convert: Callable[[Dict], object]) -> Iterator:
+        """Yield converted row dicts from cursor, releasing conn when done"""
+        try:
+            columns = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(self.FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield convert(dict(zip(columns, row)))
         finally:
             conn.close()
     
@@ -938,76 +1647,69 @@ class DatabaseManager:
             row = cursor.fetchone()
             
             if row:
-                doctor = dict(row)
-                doctor['languages'] = json.loads(doctor['languages'])
-                return doctor
+                return self._doctor_row(dict(row))
             return None
         finally:
             conn.close()
     
     def update_doctor(self, doctor_id: int, doctor_data: Dict) -> bool:
         """Update a doctor record"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    UPDATE doctors SET
-                        name = ?, specialty = ?, subspecialty = ?, approach = ?,
-                        phone = ?, email = ?, location = ?, languages = ?,
-                        experience = ?, education = ?, certifications = ?,
-                        availability = ?, consultation_fee = ?, notes = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (
-                    doctor_data.get('name'),
-                    doctor_data.get('specialty'),
-                    doctor_data.get('subspecialty', ''),
-                    doctor_data.get('approach', ''),
-                    doctor_data.get('phone', ''),
-                    doctor_data.get('email', ''),
-                    doctor_data.get('location', ''),
-                    json.dumps(doctor_data.get('languages', [])),
-                    doctor_data.get('experience', ''),
-                    doctor_data.get('education', ''),
-                    doctor_data.get('certifications', ''),
-                    doctor_data.get('availability', ''),
-                    doctor_data.get('consultation_fee', ''),
-                    doctor_data.get('notes', ''),
-                    doctor_id
-                ))
-                conn.commit()
-                return conn.total_changes > 0
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute('''
+                UPDATE doctors SET
+                    name = ?, specialty = ?, subspecialty = ?, approach = ?,
+                    phone = ?, email = ?, location = ?, languages = ?,
+                    experience = ?, education = ?, certifications = ?,
+                    availability = ?, consultation_fee = ?, notes = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', self._doctor_params(doctor_data) + (doctor_id,))
+            conn.commit()
+            self._invalidate_doctors_cache()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
     
     def delete_doctor(self, doctor_id: int) -> bool:
         """Soft delete a doctor (set is_active to False)"""
-        with self.lock:
-            conn = self.get_connection()
-            try:
-                conn.execute('''
-                    UPDATE doctors SET is_active = 0, updated_at = CURRENT_TIMESTAMP 
-                    WHERE id = ?
-                ''', (doctor_id,))
-                conn.commit()
-                return conn.total_changes > 0
-            finally:
-                conn.close()
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute('''
+                UPDATE doctors SET is_active = 0, updated_at = CURRENT_TIMESTAMP 
+                WHERE id = ?
+            ''', (doctor_id,))
+            conn.commit()
+            self._invalidate_doctors_cache()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
     
     def search_doctors(self, query: str, specialty: str = None) -> List[Dict]:
         """Search doctors by name, specialty, or location"""
         conn = self.get_connection()
         try:
-            sql = '''
-                SELECT * FROM doctors 
-                WHERE is_active = 1 AND (
-                    name LIKE ? OR 
-                    specialty LIKE ? OR 
-                    subspecialty LIKE ? OR 
-                    location LIKE ?
-                )
-            '''
-            params = [f'%{query}%'] * 4
+            # Trigram index needs at least three characters to match on
+            if self.doctor_fts_enabled and len(query) >= 3:
+                sql = '''
+                    SELECT * FROM doctors 
+                    WHERE is_active = 1 AND id IN (
+                        SELECT rowid FROM doctors_fts WHERE doctors_fts MATCH ?
+                    )
+                '''
+                # Quote as a single phrase so user input is not parsed as FTS syntax
+                params = ['"' + query.replace('"', '""') + '"']
+            else:
+                sql = '''
+                    SELECT * FROM doctors 
+                    WHERE is_active = 1 AND (
+                        name LIKE ? OR 
+                        specialty LIKE ? OR 
+                        subspecialty LIKE ? OR 
+                        location LIKE ?
+                    )
+                '''
+                params = [f'%{query}%'] * 4
             
             if specialty:
                 sql += ' AND specialty = ?'
@@ -1016,98 +1718,242 @@ class DatabaseManager:
             sql += ' ORDER BY name'
             
             cursor = conn.execute(sql, params)
-            doctors = []
-            
-            for row in cursor.fetchall():
-                doctor = dict(row)
-                doctor['languages'] = json.loads(doctor['languages'])
-                doctors.append(doctor)
+            doctors = rows_to_dicts(cursor)
+            for doctor in doctors:
+                doctor['languages'] = json_loads(doctor['languages'])
             
             return doctors
         finally:
             conn.close()
     
     def _import_doctors_from_csv(self):
-        """Import doctors from CSV file if database is empty"""
+        """Import doctors from CSV file if database is empty and the CSV is new"""
         try:
             logger.info("Checking if doctors need to be imported from CSV...")
             
-            # Check if doctors table is empty
-            conn = self.get_connection()
-            try:
-                cursor = conn.execute('SELECT COUNT(*) FROM doctors')
-                count = cursor.fetchone()[0]
-            finally:
-                conn.close()
-            
-            if count > 0:
-                logger.info(f"Found {count} doctors in database, skipping CSV import")
-                return
-            
-            # Import from CSV
-            import csv
-            import os
-            
             csv_path = os.path.join(BASE_DIR, 'assets/psychiatrists.csv')
             if not os.path.exists(csv_path):
                 logger.warning("Psychiatrists CSV file not found, skipping import")
                 return
             
-            logger.info("Starting CSV import...")
-            imported_count = 0
+            csv_hash = self._file_sha256(csv_path)
             
-            with open(csv_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    try:
-                        if not row.get('name') or not row.get('name').strip():  # Skip empty rows
-                            continue
-                        
-                        # Parse languages
-                        languages_str = row.get('languages', '').strip()
-                        if not languages_str:
-                            continue  # Skip if no languages
-                        
-                        languages = [lang.strip() for lang in languages_str.split(',') if lang.strip()]
-                        if not languages:
-                            continue
-                        
-                        # Create doctor data
-                        doctor_data = {
-                            'name': row.get('name', '').strip(),
-                            'specialty': row.get('specialty', '').strip(),
-                            'subspecialty': row.get('subspecialty', '').strip(),
-                            'approach': row.get('approach', '').strip(),
-                            'phone': row.get('phone', '').strip(),
-                            'email': '',  # Not in CSV
-                            'location': row.get('location', '').strip(),
-                            'languages': languages,
-                            'experience': row.get('experience', '').strip(),
-                            'education': '',  # Not in CSV
-                            'certifications': '',  # Not in CSV
-                            'availability': '',  # Not in CSV
-                            'consultation_fee': '',  # Not in CSV
-                            'notes': ''  # Not in CSV
-                        }
-                        
-                        # Only import if we have required fields
-                        if doctor_data['name'] and doctor_data['specialty'] and languages:
-                            self.create_doctor(doctor_data)
-                            imported_count += 1
-                            logger.info(f"Imported doctor: {doctor_data['name']}")
-                    
-                    except Exception as row_error:
-                        logger.error(f"Error importing row {row}: {str(row_error)}")
-                        continue
+            with self.transaction() as conn:
+                # Take the write lock up front so concurrent workers import once
+                conn.execute('BEGIN IMMEDIATE')
+                
+                row = conn.execute('SELECT value FROM meta WHERE key = ?',
+                                   (self.DOCTORS_CSV_HASH_KEY,)).fetchone()
+                if row and row[0] == csv_hash:
+                    logger.info("Psychiatrists CSV unchanged since last import, skipping CSV import")
+                    return
+                
+                # Check if doctors table is empty
+                count = conn.execute('SELECT COUNT(*) FROM doctors').fetchone()[0]
+                if count > 0:
+                    logger.info(f"Found {count} doctors in database, skipping CSV import")
+                    return
+                
+                logger.info("Starting CSV import...")
+                cursor = conn.executemany(self.INSERT_DOCTOR_SQL,
+                                          map(self._doctor_params, self._read_doctors_csv(csv_path)))
+                imported_count = cursor.rowcount
+                conn.execute('''
+                    INSERT INTO meta (key, value) VALUES (?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                ''', (self.DOCTORS_CSV_HASH_KEY, csv_hash))
             
+            self._invalidate_doctors_cache()
             logger.info(f"Successfully imported {imported_count} doctors from CSV")
             
         except Exception as e:
             logger.error(f"Error importing doctors from CSV: {str(e)}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
+    
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        """SHA-256 hex digest of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _read_doctors_csv(self, csv_path: str) -> Iterator[Dict]:
+        """Yield doctor records from the psychiatrists CSV, skipping incomplete rows"""
+        with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            
+            # Column index per field; fields missing from the header point at
+            # an extra blank column that every row is padded with
+            width = len(header)
+            (name_i, specialty_i, subspecialty_i, approach_i, phone_i,
+             location_i, languages_i, experience_i) = (
+                header.index(field) if field in header else width
+                for field in self.CSV_DOCTOR_FIELDS
+            )
+            
+            for row in reader:
+                try:
+                    if len(row) <= width:
+                        row.extend([''] * (width + 1 - len(row)))
+                    
+                    # Check required fields before building anything
+                    name = row[name_i].strip()
+                    if not name:  # Skip empty rows
+                        continue
+                    
+                    specialty = row[specialty_i].strip()
+                    if not specialty:
+                        continue
+                    
+                    # Parse languages
+                    languages_str = row[languages_i].strip()
+                    if not languages_str:
+                        continue  # Skip if no languages
+                    
+                    languages = [lang.strip() for lang in languages_str.split(',') if lang.strip()]
+                    if not languages:
+                        continue
+                    
+                    yield {
+                        'name': name,
+                        'specialty': specialty,
+                        'subspecialty': row[subspecialty_i].strip(),
+                        'approach': row[approach_i].strip(),
+                        'phone': row[phone_i].strip(),
+                        'email': '',  # Not in CSV
+                        'location': row[location_i].strip(),
+                        'languages': languages,
+                        'experience': row[experience_i].strip(),
+                        'education': '',  # Not in CSV
+                        'certifications': '',  # Not in CSV
+                        'availability': '',  # Not in CSV
+                        'consultation_fee': '',  # Not in CSV
+                        'notes': ''  # Not in CSV
+                    }
+                
+                except Exception as row_error:
+                    logger.error(f"Error importing row {row}: {str(row_error)}")
+                    continue
+
+# Speaker labels for chat history included in the analysis report prompt
+REPORT_CHAT_ROLES = {"user": "User", "assistant": "Assistant"}
+
+# Static parts of the analysis report prompt; only the patient details and
+# DSM matches between them change per request
+ANALYSIS_PROMPT_INTRO_EN = "You are a clinical psychiatrist providing a comprehensive mental health assessment report. "
+ANALYSIS_PROMPT_INTRO_ZH = ANALYSIS_PROMPT_INTRO_EN + "Please respond in Traditional Chinese (繁體中文)."
+ANALYSIS_PROMPT_GUIDELINES = """
+
+Please provide a detailed psychiatric analysis report including:
+
+1. **Clinical Impression**: Professional assessment of the presented symptoms
+2. **Differential Diagnosis**: Possible conditions to consider based on DSM-5-TR criteria
+3. **Risk Assessment**: Evaluate any immediate safety concerns
+4. **Recommended Interventions**: 
+   - Immediate steps to take
+   - Therapeutic approaches to consider
+   - Lifestyle modifications
+5. **Follow-up Care**: Timeline and type of professional care needed
+6. **Psychoeducation**: Brief explanation for patient understanding
+
+IMPORTANT GUIDELINES:
+- Base analysis on evidence-based psychiatric principles
+- Reference DSM-5-TR criteria when appropriate
+- Emphasize the need for professional evaluation
+- Be empathetic and non-judgmental
+- Include safety considerations
+- Avoid definitive diagnoses - use terms like "suggests," "consistent with," "warrants evaluation for"
+
+Format the response as a professional clinical report that could be shared with healthcare providers."""
+
+# Static parts of the chat prompt, around the per-turn conversation context
+CHAT_PROMPT_ROLE = """
+
+ROLE: You are empathetic, professional, and knowledgeable about mental health. Your goal is to:
+1. Conduct a supportive conversation to understand the user's concerns
+2. Recommend appropriate standardized assessments when suitable
+3. Provide psychoeducation and coping strategies
+4. Always emphasize the importance of professional help when needed
+
+"""
+CHAT_PROMPT_INTRO_EN = "You are a professional clinical psychologist assistant providing mental health screening and support. " + CHAT_PROMPT_ROLE
+CHAT_PROMPT_INTRO_ZH = "You are a professional clinical psychologist assistant providing mental health screening and support. 請用繁體中文回應。" + CHAT_PROMPT_ROLE
+CHAT_PROMPT_GUIDELINES = """RESPONSE GUIDELINES:
+- Be warm, empathetic, and non-judgmental
+- Build rapport through 2-3 exchanges, then move toward assessment when appropriate
+- Ask open-ended questions to explore their experiences naturally
+- After understanding their main concerns, suggest relevant assessments:
+  * Depression symptoms (sadness, hopelessness, loss of interest, fatigue) → PHQ-9 assessment
+  * Anxiety symptoms (worry, panic, restlessness, nervousness) → GAD-7 assessment  
+  * Sleep issues (insomnia, sleep disturbances, fatigue) → Insomnia Severity Index
+  * Health anxiety (excessive worry about physical health, somatic symptoms) → Whiteley-7 assessment
+- Balance conversation with clinical progress - don't avoid assessments indefinitely
+- If someone shares clear symptoms, acknowledge them and suggest appropriate screening
+- Provide brief psychoeducation when appropriate
+- Always remind users this is not a substitute for professional care
+- Keep responses conversational and supportive (2-3 sentences max)
+
+RESPONSE FORMAT:
+You MUST respond with ONLY a valid JSON object. No additional text before or after. Use this exact structure:
+
+{
+    "message": "Your empathetic response here (2-3 sentences max)",
+    "assessment_recommendation": "phq9|gad7|isi|whiteley|none",
+    "conversation_stage": "initial|assessment|support|referral",
+    "follow_up_questions": ["Optional follow-up question"],
+    "psychoeducation": "Brief educational note if relevant"
+}
+
+IMPORTANT: Return ONLY the JSON object, nothing else. No explanations, no additional text.
+
+JSON Response:"""
+
+# Keyword triggers for the no-LLM chat fallback, in priority order. Each group
+# is one case-insensitive alternation so the recent text is scanned once per
+# assessment without lowercasing it first.
+FALLBACK_ASSESSMENT_TRIGGERS = tuple(
+    (assessment, re.compile('|'.join(map(re.escape, words)), re.IGNORECASE))
+    for assessment, words in (
+        ('phq9', ['sad', 'depressed', 'hopeless', 'worthless', 'tired', 'sleep', 'down']),
+        ('gad7', ['anxious', 'worry', 'panic', 'nervous', 'restless', 'fear']),
+        ('whiteley', ['health', 'sick', 'disease', 'symptoms', 'body', 'illness'])
+    )
+)
+
+# Session IDs are 10-100 characters of letters, digits, underscores and dashes
+SESSION_ID_CHARS = b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-'
+
+# Outermost {...} span in an LLM reply
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Decodes the first JSON value at an offset, ignoring any text after it
+JSON_DECODER = json.JSONDecoder()
+
+CHAT_MESSAGE_RE = re.compile(r'"message":\s*"([^"]*)"')
+
+# Opening of the "message" string in a streamed JSON chat reply, and a decoder
+# for its raw chunks (models sometimes emit literal newlines inside strings)
+CHAT_MESSAGE_START_RE = re.compile(r'"message"\s*:\s*"')
+JSON_STRING_DECODER = json.JSONDecoder(strict=False)
+JSON_ARTIFACT_RE = re.compile(r'[{}"]')
+MESSAGE_LABEL_RE = re.compile(r'message:\s*')
+ASSESSMENT_FIELD_RE = re.compile(r'assessment_recommendation:.*')
 
 class LLMService:
+    # Seconds between background Ollama health checks
+    OLLAMA_CHECK_INTERVAL = 30
+    
+    # Most recent messages loaded into a session for prompt context
+    CHAT_CONTEXT_MESSAGES = 6
+    
+    # Analysis reports kept for identical prompts (entries, seconds)
+    REPORT_CACHE_SIZE = 512
+    REPORT_CACHE_TTL = 3600
+    
     def __init__(self):
         self.preferred_provider = os.getenv('LLM_PROVIDER', 'auto').lower()
         
@@ -1124,9 +1970,105 @@ class LLMService:
         logger.info(f"OpenRouter URL: {self.openrouter_url}")
         logger.info(f"Ollama URL: {self.ollama_url}")
         
+        # One keep-alive session for all provider calls; 429/5xx responses
+        # are retried with backoff before the status is reported
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2, connect=0, read=0, backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(['GET', 'POST']),
+                raise_on_status=False
+            )
+        )
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+        self._ollama_headers = {"Content-Type": "application/json"}
+        self._openai_headers = {
+            "Authorization": f"Bearer {self.openai_api_key}",
+            "Content-Type": "application/json"
+        }
+        self._openrouter_headers = {
+            "Authorization": f"Bearer {self.openrouter_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        # prompt digest -> (stored_at, report, provider), least recently used first
+        self._report_cache = OrderedDict()
+        self._report_cache_lock = threading.Lock()
+        
+        self._provider_chain = self._build_provider_chain()
+        
+        # When the provider chain gates Ollama on its health, the health is
+        # checked off the request path; until the first check finishes it is
+        # treated as unavailable
+        self._ollama_ok = False
+        self._ollama_watched = any(check is not None for _, _, check in self._provider_chain)
+        if self._ollama_watched:
+            threading.Thread(target=self._watch_ollama, name='ollama-health', daemon=True).start()
+        self._stream_queries = {
+            'ollama': self._query_ollama_stream,
+            'openai': self._query_openai_stream,
+            'openrouter': self._query_openrouter_stream
+        }
+        logger.info(f"LLM provider chain: {[name for name, _, _ in self._provider_chain] or ['fallback']}")
+        
         # Use database for session management
         self.session_timeout = 3600  # 1 hour timeout
         
+    def _build_provider_chain(self) -> List[Tuple[str, Callable[[str], str], Optional[Callable[[], bool]]]]:
+        """Ordered (name, query, availability check) providers for the configured LLM_PROVIDER"""
+        if self.preferred_provider == 'ollama':
+            return [('ollama', self._query_ollama, None)]
+        if self.preferred_provider == 'openai' and self.openai_api_key:
+            return [('openai', self._query_openai, None)]
+        if self.preferred_provider == 'openrouter' and self.openrouter_api_key:
+            return [('openrouter', self._query_openrouter, None)]
+        if self.preferred_provider == 'fallback':
+            return []
+        
+        # Auto mode - try in priority order, skipping Ollama when it is down
+        chain = [('ollama', self._query_ollama, self._is_ollama_available)]
+        if self.openai_api_key:
+            chain.append(('openai', self._query_openai, None))
+        if self.openrouter_api_key:
+            chain.append(('openrouter', self._query_openrouter, None))
+        return chain
+    
+    def _query_llm(self, prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """Query providers in chain order, returning (response, provider) from the first that answers"""
+        for name, query, is_available in self._provider_chain:
+            if is_available is not None and not is_available():
+                continue
+            try:
+                response = query(prompt)
+            except Exception as e:
+                logger.error(f"LLM query failed with {name}: {str(e)}")
+                continue
+            if response:
+                return response, name
+            logger.error(f"Empty response received from {name}")
+        return None, None
+    
+    def _stream_llm(self, prompt: str) -> Tuple[Optional[Iterator[str]], Optional[str]]:
+        """Open a text stream from the first provider in chain order that starts answering"""
+        for name, _, is_available in self._provider_chain:
+            if is_available is not None and not is_available():
+                continue
+            stream = self._stream_queries[name](prompt)
+            try:
+                first_chunk = next(stream)
+            except StopIteration:
+                logger.error(f"Empty response received from {name}")
+                continue
+            except Exception as e:
+                logger.error(f"LLM stream failed with {name}: {str(e)}")
+                continue
+            return itertools.chain((first_chunk,), stream), name
+        return None, None
+    
     def _cleanup_expired_sessions(self):
         """Remove expired sessions to prevent memory leaks"""
         return db_manager.cleanup_expired_sessions(timeout_hours=1)
@@ -1136,209 +2078,255 @@ class LLMService:
         if not session_id or not isinstance(session_id, str):
             return False
         
-        # Session ID should be alphanumeric with underscores and dashes
-        if not re.match(r'^[a-zA-Z0-9_-]+$', session_id):
-            return False
-        
         # Reasonable length limits
-        if len(session_id) < 10 or len(session_id) > 100:
+        if not 10 <= len(session_id) <= 100 or not session_id.isascii():
             return False
         
-        return True
+        # Session ID should be alphanumeric with underscores and dashes;
+        # deleting every allowed byte must leave nothing behind
+        return not session_id.encode('ascii').translate(None, SESSION_ID_CHARS)
     
     def _get_session(self, session_id: str, language: str = 'en') -> Dict:
-        """Get or create a chat session with proper validation"""
-        if not self._validate_session_id(session_id):
-            raise ValueError(f"Invalid session ID format: {session_id}")
-        
+        """Get or create a chat session; the ID must already be validated"""
         # Try to get existing session from database
         session_data = db_manager.get_user_session(session_id)
         
         if session_data:
-            # Update activity and return existing session
-            db_manager.update_session_activity(session_id)
-            # Convert database format to expected format
+            # Convert database format to expected format; activity is
+            # updated when the chat turn is committed
             return {
-                'messages': db_manager.get_chat_history(session_id),
+                'messages': deque(db_manager.get_chat_history(session_id, limit=self.CHAT_CONTEXT_MESSAGES),
+                                  maxlen=self.CHAT_CONTEXT_MESSAGES),
                 'context': {
                     'language': session_data['language'],
-                    'user_info': json.loads(session_data.get('user_info', '{}')),
+                    'user_info': json_loads(session_data.get('user_info', '{}')),
                     'assessment_recommendations': [],
                     'conversation_stage': session_data['conversation_stage']
                 },
-                'created_at': session_data['created_at'],
-                'last_activity': session_data['last_activity'],
+                'created_at': session_data['created_at_epoch'],
+                'last_activity': session_data['last_activity_epoch'],
                 'message_count': session_data['message_count']
             }
         else:
             # Create new session in database
             db_manager.create_user_session(session_id, language)
             logger.info(f"Created new session: {session_id}")
+            now = int(time.time())
             return {
-                'messages': [],
+                'messages': deque(maxlen=self.CHAT_CONTEXT_MESSAGES),
                 'context': {
                     'language': language,
                     'user_info': {},
                     'assessment_recommendations': [],
                     'conversation_stage': 'initial'
-                },
-                'created_at': datetime.now().isoformat(),
-                'last_activity': datetime.now().isoformat(),
-                'message_count': 0
-            }
-        
-    def generate_analysis_report(self, symptoms: str, age: int, duration: str, dsm_matches: List[Dict], language: str = 'en') -> str:
-        """Generate comprehensive analysis report using LLM"""
-        
-        # Create detailed prompt for psychiatric analysis
-        prompt = self._create_analysis_prompt(symptoms, age, duration, dsm_matches, language)
-        
-        logger.info(f"Generating analysis report - provider: {self.preferred_provider}, language: {language}")
-        logger.info(f"DSM matches count: {len(dsm_matches)}, symptoms length: {len(symptoms)}")
-        
-        # Use specified provider or auto-fallback
-        try:
-            report = None
-            provider_used = None
-            
-            if self.preferred_provider == 'ollama':
-                report = self._query_ollama(prompt)
-                provider_used = 'ollama'
-            elif self.preferred_provider == 'openai' and self.openai_api_key:
-                report = self._query_openai(prompt)
-                provider_used = 'openai'
-            elif self.preferred_provider == 'openrouter':
-                report = self._query_openrouter(prompt)
-                provider_used = 'openrouter'
-            elif self.preferred_provider == 'fallback':
-                return self._generate_fallback_report(dsm_matches, language)
-            else:  # auto mode - try in priority order
-                if self._is_ollama_available():
-                    report = self._query_ollama(prompt)
-                    provider_used = 'ollama'
-                elif self.openai_api_key:
-                    report = self._query_openai(prompt)
-                    provider_used = 'openai'
-                elif self.openrouter_api_key:
-                    report = self._query_openrouter(prompt)
-                    provider_used = 'openrouter'
-                else:
-                    logger.warning("No LLM provider available for report generation - using fallback")
-                    return self._generate_fallback_report(dsm_matches, language)
-            
-            if report:
-                logger.info(f"Report generated successfully using {provider_used}, length: {len(report)}")
-                return report
-            else:
-                logger.error(f"Empty report received from {provider_used}")
-                return self._generate_fallback_report(dsm_matches, language)
-                
-        except Exception as e:
-            logger.error(f"LLM report generation failed with {self.preferred_provider}: {str(e)}")
-            return self._generate_fallback_report(dsm_matches, language)
-    
-    def _create_analysis_prompt(self, symptoms: str, age: int, duration: str, dsm_matches: List[Dict], language: str) -> str:
-        """Create detailed prompt for LLM analysis"""
-        
-        lang_instruction = ""
-        if language == 'zh':
-            lang_instruction = "Please respond in Traditional Chinese (繁體中文)."
-        
-        dsm_context = ""
-        if dsm_matches:
-            dsm_context = "DSM-5-TR Analysis Results:\n"
-            for match in dsm_matches[:3]:
-                dsm_context += f"- {match['disorder']} (Code: {match['code']}) - {match['confidence']:.1f}% match\n"
-                dsm_context += f"  Matched keywords: {', '.join(match['matched_keywords'])}\n"
-        
-        prompt = f"""You are a clinical psychiatrist providing a comprehensive mental health assessment report. {lang_instruction}
-
-PATIENT INFORMATION:
-- Age: {age} years old
-- Symptom Duration: {duration}
-- Reported Symptoms: {symptoms}
-
-{dsm_context}
-
-Please provide a detailed psychiatric analysis report including:
-
-1. **Clinical Impression**: Professional assessment of the presented symptoms
-2. **Differential Diagnosis**: Possible conditions to consider based on DSM-5-TR criteria
-3. **Risk Assessment**: Evaluate any immediate safety concerns
-4. **Recommended Interventions**: 
-   - Immediate steps to take
-   - Therapeutic approaches to consider
-   - Lifestyle modifications
-5. **Follow-up Care**: Timeline and type of professional care needed
-6. **Psychoeducation**: Brief explanation for patient understanding
-
-IMPORTANT GUIDELINES:
-- Base analysis on evidence-based psychiatric principles
-- Reference DSM-5-TR criteria when appropriate
-- Emphasize the need for professional evaluation
-- Be empathetic and non-judgmental
-- Include safety considerations
-- Avoid definitive diagnoses - use terms like "suggests," "consistent with," "warrants evaluation for"
-
-Format the response as a professional clinical report that could be shared with healthcare providers."""
-
-        return prompt
+                },
+                'created_at': now,
+                'last_activity': now,
+                'message_count': 0
+            }
+        
+    def generate_analysis_report(self, symptoms: str, age: int, duration: str, dsm_matches: List[Dict], language: str = 'en') -> str:
+        """Generate comprehensive analysis report using LLM"""
+        
+        # Create detailed prompt for psychiatric analysis
+        prompt = self._create_analysis_prompt(symptoms, age, duration, dsm_matches, language)
+        
+        logger.info(f"Generating analysis report - provider: {self.preferred_provider}, language: {language}")
+        logger.info(f"DSM matches count: {len(dsm_matches)}, symptoms length: {len(symptoms)}")
+        
+        # Identical prompts get the same report without another LLM call
+        cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        cached = self._get_cached_report(cache_key)
+        if cached:
+            logger.info(f"Report served from cache ({cached[1]}), length: {len(cached[0])}")
+            return cached[0]
+        
+        # Use the configured provider chain, falling back to a static report
+        report, provider_used = self._query_llm(prompt)
+        if report:
+            logger.info(f"Report generated successfully using {provider_used}, length: {len(report)}")
+            self._cache_report(cache_key, report, provider_used)
+            return report
+        
+        logger.warning("No LLM provider available for report generation - using fallback")
+        return self._generate_fallback_report(dsm_matches, language)
     
-    def chat_conversation(self, session_id: str, user_message: str, language: str = 'en') -> Dict:
-        """Handle chat conversation with LLM-powered responses"""
+    def _get_cached_report(self, cache_key: bytes) -> Optional[Tuple[str, str]]:
+        """Return a cached (report, provider) if it is still fresh"""
+        with self._report_cache_lock:
+            entry = self._report_cache.get(cache_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.REPORT_CACHE_TTL:
+                del self._report_cache[cache_key]
+                return None
+            self._report_cache.move_to_end(cache_key)
+            return entry[1], entry[2]
+    
+    def _cache_report(self, cache_key: bytes, report: str, provider: str):
+        """Store a generated report, evicting the least recently used"""
+        with self._report_cache_lock:
+            self._report_cache[cache_key] = (time.monotonic(), report, provider)
+            self._report_cache.move_to_end(cache_key)
+            while len(self._report_cache) > self.REPORT_CACHE_SIZE:
+                self._report_cache.popitem(last=False)
+    
+    def _create_analysis_prompt(self, symptoms: str, age: int, duration: str, dsm_matches: List[Dict], language: str) -> str:
+        """Create detailed prompt for LLM analysis"""
         
-        try:
-            # Get or create session with proper validation
-            session = self._get_session(session_id, language)
-            
-            # Increment message count and update activity
-            session['message_count'] += 1
-            session['last_activity'] = time.time()
-            
-            # Check for message limits per session (prevent abuse)
-            if session['message_count'] > 100:
-                logger.warning(f"Session {session_id} exceeded message limit")
-                return {
-                    "message": "Session limit reached. Please start a new conversation.",
-                    "assessment_recommendation": "none",
-                    "conversation_stage": "limit_reached"
-                }
-                
-        except ValueError as e:
-            logger.error(f"Session validation error: {e}")
+        parts = [
+            ANALYSIS_PROMPT_INTRO_ZH if language == 'zh' else ANALYSIS_PROMPT_INTRO_EN,
+            "\n\nPATIENT INFORMATION:\n"
+            f"- Age: {age} years old\n"
+            f"- Symptom Duration: {duration}\n"
+            f"- Reported Symptoms: {symptoms}\n\n"
+        ]
+        
+        if dsm_matches:
+            parts.append("DSM-5-TR Analysis Results:\n")
+            for match in itertools.islice(dsm_matches, 3):
+                parts.append(f"- {match['disorder']} (Code: {match['code']}) - {match['confidence']:.1f}% match\n")
+                parts.append(f"  Matched keywords: {', '.join(match['matched_keywords'])}\n")
+        
+        parts.append(ANALYSIS_PROMPT_GUIDELINES)
+        return "".join(parts)
+    
+    
+    def _begin_chat_turn(self, session_id: str, language: str) -> Tuple[Optional[Dict], Optional[Dict], int]:
+        """Load the session for a new user message, returning (error response, session, new message count)"""
+        
+        if not self._validate_session_id(session_id):
+            logger.error(f"Session validation error: Invalid session ID format: {session_id}")
             return {
                 "message": "Invalid session. Please refresh the page.",
                 "assessment_recommendation": "none",
                 "conversation_stage": "error"
-            }
+            }, None, 0
         
-        # Add user message to database
-        db_manager.add_chat_message(session_id, 'user', user_message)
+        # Get or create session
+        session = self._get_session(session_id, language)
         
-        # Update session message count
+        # Count the user's message and update activity
         new_message_count = session['message_count'] + 1
-        db_manager.update_session_activity(session_id, message_count=new_message_count)
+        session['last_activity'] = int(time.time())
+        
+        # Check for message limits per session (prevent abuse)
+        if new_message_count > 100:
+            logger.warning(f"Session {session_id} exceeded message limit")
+            return {
+                "message": "Session limit reached. Please start a new conversation.",
+                "assessment_recommendation": "none",
+                "conversation_stage": "limit_reached"
+            }, None, 0
+        
+        return None, session, new_message_count
+    
+    def chat_conversation(self, session_id: str, user_message: str, language: str = 'en') -> Dict:
+        """Handle chat conversation with LLM-powered responses"""
+        
+        error_response, session, new_message_count = self._begin_chat_turn(session_id, language)
+        if error_response:
+            return error_response
         
         # Generate LLM response
         try:
             response_data = self._generate_chat_response(session, user_message, language, session_id)
             
-            # Add assistant response to database
-            db_manager.add_chat_message(session_id, 'assistant', response_data['message'], 
-                                      response_data.get('metadata', {}))
-            
-            # Update session with conversation stage
-            if response_data.get('conversation_stage'):
-                db_manager.update_session_activity(session_id, 
-                                                 message_count=new_message_count + 1,
-                                                 conversation_stage=response_data['conversation_stage'])
+            # Store both messages and the updated session in one transaction
+            db_manager.commit_chat_turn(session_id, user_message, response_data['message'],
+                                        response_data.get('metadata', {}),
+                                        message_count=new_message_count + 1,
+                                        conversation_stage=response_data.get('conversation_stage'))
             
             return response_data
             
         except Exception as e:
             logger.error(f"Chat conversation error: {str(e)}")
+            # Keep the user's message even though there is no reply to store
+            db_manager.add_chat_message(session_id, 'user', user_message,
+                                        message_count=new_message_count)
             return self._generate_fallback_chat_response(language, session)
     
+    def chat_conversation_stream(self, session_id: str, user_message: str, language: str = 'en') -> Iterator[Tuple[str, object]]:
+        """Handle chat conversation, yielding ('delta', text) as the reply streams in and finally ('done', response)"""
+        
+        error_response, session, new_message_count = self._begin_chat_turn(session_id, language)
+        if error_response:
+            yield 'done', error_response
+            return
+        
+        prompt = self._create_chat_prompt(session, user_message, language, session_id)
+        
+        try:
+            stream, provider_used = self._stream_llm(prompt)
+            if stream is None:
+                logger.warning("No LLM provider available - using fallback response")
+                response_data = self._generate_fallback_chat_response(language, session)
+            else:
+                # Forward the message text as it arrives; the JSON reply is
+                # only parsed once it is complete
+                chunks = []
+                for text in self._stream_chat_message(stream, chunks):
+                    yield 'delta', text
+                llm_response = ''.join(chunks)
+                logger.info(f"LLM response streamed from {provider_used}: {llm_response[:200]}...")
+                response_data = self._parse_chat_response(llm_response, session, language)
+            
+            # Store both messages and the updated session in one transaction
+            db_manager.commit_chat_turn(session_id, user_message, response_data['message'],
+                                        response_data.get('metadata', {}),
+                                        message_count=new_message_count + 1,
+                                        conversation_stage=response_data.get('conversation_stage'))
+            
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            # Keep the user's message even though there is no reply to store
+            db_manager.add_chat_message(session_id, 'user', user_message,
+                                        message_count=new_message_count)
+            response_data = self._generate_fallback_chat_response(language, session)
+        
+        yield 'done', response_data
+    
+    @staticmethod
+    def _stream_chat_message(chunks: Iterable[str], collected: List[str]) -> Iterator[str]:
+        """Decoded pieces of the reply's "message" string as its chunks arrive, collecting every chunk"""
+        buffer = ''
+        position = None
+        finished = False
+        for chunk in chunks:
+            collected.append(chunk)
+            if finished:
+                continue
+            buffer += chunk
+            if position is None:
+                match = CHAT_MESSAGE_START_RE.search(buffer)
+                if not match:
+                    continue
+                position = match.end()
+            
+            # Advance over complete characters and escapes up to the closing quote
+            start = position
+            while position < len(buffer):
+                char = buffer[position]
+                if char == '"':
+                    finished = True
+                    break
+                if char != '\\':
+                    position += 1
+                    continue
+                if buffer[position + 1:position + 2] != 'u':
+                    width = 2
+                elif buffer[position + 2:position + 4].lower() in ('d8', 'd9', 'da', 'db'):
+                    width = 12  # Keep surrogate pairs together
+                else:
+                    width = 6
+                if position + width > len(buffer):
+                    break
+                position += width
+            
+            if position > start:
+                yield JSON_STRING_DECODER.decode(f'"{buffer[start:position]}"')
+    
     def _generate_chat_response(self, session: Dict, user_message: str, language: str, session_id: str) -> Dict:
         """Generate intelligent chat response using LLM"""
         
@@ -1350,29 +2338,10 @@ Format the response as a professional clinical report that could be shared with
         provider_used = None
         
         try:
-            if self.preferred_provider == 'ollama':
-                llm_response = self._query_ollama(prompt)
-                provider_used = 'ollama'
-            elif self.preferred_provider == 'openai' and self.openai_api_key:
-                llm_response = self._query_openai(prompt)
-                provider_used = 'openai'
-            elif self.preferred_provider == 'openrouter' and self.openrouter_api_key:
-                llm_response = self._query_openrouter(prompt)
-                provider_used = 'openrouter'
-            else:
-                # Auto-select available provider
-                if self._is_ollama_available():
-                    llm_response = self._query_ollama(prompt)
-                    provider_used = 'ollama'
-                elif self.openai_api_key:
-                    llm_response = self._query_openai(prompt)
-                    provider_used = 'openai'
-                elif self.openrouter_api_key:
-                    llm_response = self._query_openrouter(prompt)
-                    provider_used = 'openrouter'
-                else:
-                    logger.warning("No LLM provider available - using fallback response")
-                    return self._generate_fallback_chat_response(language, session)
+            llm_response, provider_used = self._query_llm(prompt)
+            if not llm_response:
+                logger.warning("No LLM provider available - using fallback response")
+                return self._generate_fallback_chat_response(language, session)
             
             logger.info(f"LLM response received from {provider_used}: {llm_response[:200]}...")
             
@@ -1394,15 +2363,11 @@ Format the response as a professional clinical report that could be shared with
     def _create_chat_prompt(self, session: Dict, user_message: str, language: str, session_id: str = None) -> str:
         """Create chat prompt for LLM"""
         
-        lang_instruction = ""
-        if language == 'zh':
-            lang_instruction = "請用繁體中文回應。"
-        
         # Build conversation history
-        conversation_history = ""
-        for msg in session['messages'][-6:]:  # Last 6 messages for context
+        history_lines = []
+        for msg in session['messages']:  # Last 6 messages for context
             role = "用戶" if language == 'zh' and msg['role'] == 'user' else msg['role'].title()
-            conversation_history += f"{role}: {msg['content']}\n"
+            history_lines.append(f"{role}: {msg['content']}\n")
         
         conversation_stage = session['context'].get('conversation_stage', 'initial')
         
@@ -1410,7 +2375,7 @@ Format the response as a professional clinical report that could be shared with
         if user_message in ["START_CONVERSATION", "FRESH_START_CONVERSATION"]:
             # For fresh starts, ensure completely clean session
             if user_message == "FRESH_START_CONVERSATION":
-                session['messages'] = []  # Clear any existing messages
+                session['messages'].clear()  # Clear any existing messages
                 session['context']['conversation_stage'] = 'initial'
                 session['context']['assessment_recommendations'] = []
                 logger.info(f"Fresh start for session {session_id}")
@@ -1420,104 +2385,61 @@ Format the response as a professional clinical report that could be shared with
             else:
                 user_message = "Please introduce yourself in a friendly and professional way, and ask how you can help me today. This is a completely fresh conversation."
         
-        prompt = f"""You are a professional clinical psychologist assistant providing mental health screening and support. {lang_instruction}
-
-ROLE: You are empathetic, professional, and knowledgeable about mental health. Your goal is to:
-1. Conduct a supportive conversation to understand the user's concerns
-2. Recommend appropriate standardized assessments when suitable
-3. Provide psychoeducation and coping strategies
-4. Always emphasize the importance of professional help when needed
-
-CONVERSATION CONTEXT:
-Stage: {conversation_stage}
-Language: {language}
-
-CONVERSATION HISTORY:
-{conversation_history}
-
-CURRENT USER MESSAGE: {user_message}
-
-RESPONSE GUIDELINES:
-- Be warm, empathetic, and non-judgmental
-- Build rapport through 2-3 exchanges, then move toward assessment when appropriate
-- Ask open-ended questions to explore their experiences naturally
-- After understanding their main concerns, suggest relevant assessments:
-  * Depression symptoms (sadness, hopelessness, loss of interest, fatigue) → PHQ-9 assessment
-  * Anxiety symptoms (worry, panic, restlessness, nervousness) → GAD-7 assessment  
-  * Sleep issues (insomnia, sleep disturbances, fatigue) → Insomnia Severity Index
-  * Health anxiety (excessive worry about physical health, somatic symptoms) → Whiteley-7 assessment
-- Balance conversation with clinical progress - don't avoid assessments indefinitely
-- If someone shares clear symptoms, acknowledge them and suggest appropriate screening
-- Provide brief psychoeducation when appropriate
-- Always remind users this is not a substitute for professional care
-- Keep responses conversational and supportive (2-3 sentences max)
-
-RESPONSE FORMAT:
-You MUST respond with ONLY a valid JSON object. No additional text before or after. Use this exact structure:
-
-{{
-    "message": "Your empathetic response here (2-3 sentences max)",
-    "assessment_recommendation": "phq9|gad7|isi|whiteley|none",
-    "conversation_stage": "initial|assessment|support|referral",
-    "follow_up_questions": ["Optional follow-up question"],
-    "psychoeducation": "Brief educational note if relevant"
-}}
-
-IMPORTANT: Return ONLY the JSON object, nothing else. No explanations, no additional text.
-
-JSON Response:"""
-
-        return prompt
+        return "".join((
+            CHAT_PROMPT_INTRO_ZH if language == 'zh' else CHAT_PROMPT_INTRO_EN,
+            "CONVERSATION CONTEXT:\n"
+            f"Stage: {conversation_stage}\n"
+            f"Language: {language}\n\n"
+            "CONVERSATION HISTORY:\n",
+            "".join(history_lines),
+            f"\n\nCURRENT USER MESSAGE: {user_message}\n\n",
+            CHAT_PROMPT_GUIDELINES
+        ))
     
     def _parse_chat_response(self, llm_response: str, session: Dict, language: str) -> Dict:
         """Parse LLM response and extract structured data"""
         
         try:
-            import json
-            import re
-            
             # Clean the response first
             cleaned_response = llm_response.strip()
             
-            # Try multiple JSON extraction patterns
-            json_patterns = [
-                r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # Nested JSON pattern
-                r'\{.*?\}(?=\s*$)',  # JSON at end of string
-                r'\{.*?\}(?=\s*\n)',  # JSON followed by newline
-                r'\{.*\}',  # Simple JSON pattern (fallback)
-            ]
-            
             response_data = None
             
-            for pattern in json_patterns:
-                json_matches = re.findall(pattern, cleaned_response, re.DOTALL)
-                for match in json_matches:
-                    try:
-                        # Try to parse this JSON candidate
-                        candidate_data = json.loads(match.strip())
-                        
-                        # Validate it has expected fields
-                        if isinstance(candidate_data, dict) and 'message' in candidate_data:
-                            response_data = candidate_data
-                            break
-                    except json.JSONDecodeError:
-                        continue
-                
-                if response_data:
-                    break
+            # The prompt asks for only a JSON object, so try the whole reply first
+            try:
+                candidate_data = json_loads(cleaned_response)
+                if isinstance(candidate_data, dict) and 'message' in candidate_data:
+                    response_data = candidate_data
+            except json.JSONDecodeError:
+                pass
+            
+            # Otherwise decode from each '{' in turn until an object with a
+            # message turns up
+            start = -1 if response_data else cleaned_response.find('{')
+            while start != -1:
+                try:
+                    candidate_data, _ = JSON_DECODER.raw_decode(cleaned_response, start)
+                    
+                    # Validate it has expected fields
+                    if isinstance(candidate_data, dict) and 'message' in candidate_data:
+                        response_data = candidate_data
+                        break
+                except json.JSONDecodeError:
+                    pass
+                start = cleaned_response.find('{', start + 1)
             
             # If no valid JSON found, try to extract just the message content
             if not response_data:
                 # Look for message content between quotes
-                message_match = re.search(r'"message":\s*"([^"]*)"', cleaned_response)
+                message_match = CHAT_MESSAGE_RE.search(cleaned_response)
                 if message_match:
                     message_content = message_match.group(1)
                 else:
                     # Try to clean up the response and use it as message
                     # Remove any JSON-like artifacts
-                    message_content = re.sub(r'[{}"]', '', cleaned_response)
-                    message_content = re.sub(r'message:\s*', '', message_content)
-                    message_content = re.sub(r'assessment_recommendation:.*', '', message_content)
+                    message_content = JSON_ARTIFACT_RE.sub('', cleaned_response)
+                    message_content = MESSAGE_LABEL_RE.sub('', message_content)
+                    message_content = ASSESSMENT_FIELD_RE.sub('', message_content)
                     message_content = message_content.strip()
                     
                     # If still too messy, use simple fallback
@@ -1585,19 +2507,14 @@ JSON Response:"""
         
         # Simple keyword-based assessment recommendation when LLM is unavailable
         if session and session.get('messages'):
-            recent_messages = [msg['content'].lower() for msg in session['messages'][-3:] if msg['role'] == 'user']
-            combined_text = ' '.join(recent_messages)
+            combined_text = ' '.join(msg['content'] for msg in list(session['messages'])[-3:] if msg['role'] == 'user')
             
             # Hardcoded assessment logic - this is the only part that should be static
-            if any(word in combined_text for word in ['sad', 'depressed', 'hopeless', 'worthless', 'tired', 'sleep', 'down']):
-                assessment_rec = "phq9"
-                conversation_stage = "assessment"
-            elif any(word in combined_text for word in ['anxious', 'worry', 'panic', 'nervous', 'restless', 'fear']):
-                assessment_rec = "gad7"
-                conversation_stage = "assessment"
-            elif any(word in combined_text for word in ['health', 'sick', 'disease', 'symptoms', 'body', 'illness']):
-                assessment_rec = "whiteley"
-                conversation_stage = "assessment"
+            for assessment, trigger_re in FALLBACK_ASSESSMENT_TRIGGERS:
+                if trigger_re.search(combined_text):
+                    assessment_rec = assessment
+                    conversation_stage = "assessment"
+                    break
         
         return {
             "message": message,
@@ -1671,14 +2588,10 @@ Respond with ONLY the JSON object, nothing else."""
             else:
                 raise Exception("No LLM available")
 
-            # Parse the JSON response
-            import json
-            import re
-
             # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            json_match = JSON_OBJECT_RE.search(response)
             if json_match:
-                analysis = json.loads(json_match.group())
+                analysis = json_loads(json_match.group())
 
                 # Validate required fields
                 required_fields = ['emotional_health', 'stress_level', 'sleep_quality', 'social_activity']
@@ -1768,35 +2681,50 @@ Respond with ONLY the JSON object, nothing else."""
         }
 
     def _is_ollama_available(self) -> bool:
-        """Check if Ollama service is available"""
+        """Check if Ollama service is available, as of the last health check when watched"""
+        if self._ollama_watched:
+            return self._ollama_ok
+        return self._check_ollama()
+    
+    def _check_ollama(self) -> bool:
+        """Ask Ollama whether it is up"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            response = self._http.get(f"{self.ollama_url}/api/tags", timeout=2)
             return response.status_code == 200
-        except:
+        except Exception:
             return False
     
+    def _watch_ollama(self):
+        """Background loop refreshing the Ollama availability flag"""
+        while True:
+            self._ollama_ok = self._check_ollama()
+            time.sleep(self.OLLAMA_CHECK_INTERVAL)
+    
+    def _ollama_payload(self, prompt: str, stream: bool = False) -> Dict:
+        """Request body for Ollama's generate API"""
+        return {
+            "model": "llama3.2",  # Default model, can be configured
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": 2000
+            }
+        }
+    
     def _query_ollama(self, prompt: str) -> str:
         """Query Ollama local LLM"""
         try:
-            payload = {
-                "model": "llama3.2",  # Default model, can be configured
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 2000
-                }
-            }
-            
-            response = requests.post(
+            response = self._http.post(
                 f"{self.ollama_url}/api/generate",
-                json=payload,
+                headers=self._ollama_headers,
+                data=json_dumpb(self._ollama_payload(prompt)),
                 timeout=60
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 return result.get('response', 'Analysis could not be generated.')
             else:
                 raise Exception(f"Ollama API error: {response.status_code}")
@@ -1805,32 +2733,52 @@ Respond with ONLY the JSON object, nothing else."""
             logger.error(f"Ollama query failed: {str(e)}")
             raise
     
+    def _query_ollama_stream(self, prompt: str) -> Iterator[str]:
+        """Stream Ollama text chunks as they are generated"""
+        with self._http.post(
+            f"{self.ollama_url}/api/generate",
+            headers=self._ollama_headers,
+            data=json_dumpb(self._ollama_payload(prompt, stream=True)),
+            timeout=60,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"Ollama API error: {response.status_code}")
+            
+            # One JSON object per line, the last one flagged done
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+    
+    def _openrouter_payload(self, prompt: str, stream: bool = False) -> Dict:
+        """Request body for OpenRouter's chat completions API"""
+        return {
+            "model": "anthropic/claude-3-sonnet",  # Good for medical analysis
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2000,
+            "stream": stream
+        }
+    
     def _query_openrouter(self, prompt: str) -> str:
         """Query OpenRouter cloud LLM"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.openrouter_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "anthropic/claude-3-sonnet",  # Good for medical analysis
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(
+            response = self._http.post(
                 self.openrouter_url,
-                headers=headers,
-                json=payload,
+                headers=self._openrouter_headers,
+                data=json_dumpb(self._openrouter_payload(prompt)),
                 timeout=60
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 return result['choices'][0]['message']['content']
             else:
                 raise Exception(f"OpenRouter API error: {response.status_code}")
@@ -1839,36 +2787,47 @@ Respond with ONLY the JSON object, nothing else."""
             logger.error(f"OpenRouter query failed: {str(e)}")
             raise
     
+    def _query_openrouter_stream(self, prompt: str) -> Iterator[str]:
+        """Stream OpenRouter text chunks as they are generated"""
+        with self._http.post(
+            self.openrouter_url,
+            headers=self._openrouter_headers,
+            data=json_dumpb(self._openrouter_payload(prompt, stream=True)),
+            timeout=60,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"OpenRouter API error: {response.status_code}")
+            yield from self._iter_completion_deltas(response)
+    
+    def _openai_payload(self, prompt: str, stream: bool = False) -> Dict:
+        """Request body for OpenAI's chat completions API"""
+        return {
+            "model": "gpt-4o",  # Use GPT-4o for medical analysis
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": "You are a clinical psychiatrist providing comprehensive mental health assessments. Provide professional, evidence-based analysis while emphasizing the need for in-person professional evaluation."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2000,
+            "stream": stream
+        }
+    
     def _query_openai(self, prompt: str) -> str:
         """Query OpenAI GPT API"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.openai_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "gpt-4o",  # Use GPT-4o for medical analysis
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": "You are a clinical psychiatrist providing comprehensive mental health assessments. Provide professional, evidence-based analysis while emphasizing the need for in-person professional evaluation."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2000
-            }
-            
-            response = requests.post(
+            response = self._http.post(
                 "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=payload,
+                headers=self._openai_headers,
+                data=json_dumpb(self._openai_payload(prompt)),
                 timeout=60
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 return result['choices'][0]['message']['content']
             else:
                 error_msg = f"OpenAI API error: {response.status_code}"
@@ -1884,25 +2843,52 @@ Respond with ONLY the JSON object, nothing else."""
             logger.error(f"OpenAI query failed: {str(e)}")
             raise
     
+    def _query_openai_stream(self, prompt: str) -> Iterator[str]:
+        """Stream OpenAI text chunks as they are generated"""
+        with self._http.post(
+            "https://api.openai.com/v1/chat/completions",
+            headers=self._openai_headers,
+            data=json_dumpb(self._openai_payload(prompt, stream=True)),
+            timeout=60,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.status_code}")
+            yield from self._iter_completion_deltas(response)
+    
+    @staticmethod
+    def _iter_completion_deltas(response: requests.Response) -> Iterator[str]:
+        """Text deltas from a chat completions server-sent event stream"""
+        for line in response.iter_lines():
+            if not line.startswith(b'data:'):
+                continue
+            data = line[5:].strip()
+            if data == b'[DONE]':
+                break
+            choices = json_loads(data).get('choices')
+            content = choices[0].get('delta', {}).get('content') if choices else None
+            if content:
+                yield content
+    
     def _generate_fallback_report(self, dsm_matches: List[Dict], language: str) -> str:
         """Generate basic report when LLM is unavailable"""
         
         logger.warning("Using fallback clinical report - LLM not available. Check API keys or Ollama configuration.")
         
         if language == 'zh':
-            report = """# 精神健康評估報告
+            parts = ["""# 精神健康評估報告
 
 ## 臨床印象
 基於提供的症狀描述和DSM-5-TR標準分析，建議進行專業心理健康評估。
 
 ## 初步分析
-"""
+"""]
             if dsm_matches:
-                report += "根據症狀分析，可能需要評估以下狀況：\n"
-                for match in dsm_matches[:3]:
-                    report += f"- {match['disorder']} (符合度: {match['confidence']:.1f}%)\n"
+                parts.append("根據症狀分析，可能需要評估以下狀況：\n")
+                parts.extend(f"- {match['disorder']} (符合度: {match['confidence']:.1f}%)\n"
+                             for match in itertools.islice(dsm_matches, 3))
             
-            report += """
+            parts.append("""
 ## 建議事項
 1. **立即行動**: 尋求合格心理健康專業人員的評估
 2. **安全評估**: 如有自傷或傷害他人想法，請立即聯繫急診服務
@@ -1911,21 +2897,21 @@ Respond with ONLY the JSON object, nothing else."""
 
 ## 重要提醒
 此分析僅供參考，不能替代專業醫療診斷。請務必諮詢合格的心理健康專業人員。
-"""
+""")
         else:
-            report = """# Mental Health Assessment Report
+            parts = ["""# Mental Health Assessment Report
 
 ## Clinical Impression
 Based on the symptom description and DSM-5-TR criteria analysis, professional mental health evaluation is recommended.
 
 ## Initial Analysis
-"""
+"""]
             if dsm_matches:
-                report += "Based on symptom analysis, evaluation may be warranted for:\n"
-                for match in dsm_matches[:3]:
-                    report += f"- {match['disorder']} ({match['confidence']:.1f}% symptom match)\n"
+                parts.append("Based on symptom analysis, evaluation may be warranted for:\n")
+                parts.extend(f"- {match['disorder']} ({match['confidence']:.1f}% symptom match)\n"
+                             for match in itertools.islice(dsm_matches, 3))
             
-            report += """
+            parts.append("""
 ## Recommendations
 1. **Immediate Action**: Seek evaluation from qualified mental health professional
 2. **Safety Assessment**: If experiencing thoughts of self-harm or harm to others, contact emergency services immediately
@@ -1934,13 +2920,18 @@ Based on the symptom description and DSM-5-TR criteria analysis, professional me
 
 ## Important Notice
 This analysis is for informational purposes only and cannot replace professional medical diagnosis. Please consult with qualified mental health professionals.
-"""
+""")
         
-        return report
+        return "".join(parts)
 
 class AdminManager:
     """Admin panel management system"""
     
+    # Seconds a memory usage reading is reused across dashboard requests
+    MEMORY_USAGE_TTL = 1
+    # Seconds between last_activity refreshes of an admin session
+    ACTIVITY_UPDATE_INTERVAL = 60
+    
     def __init__(self):
         self.session_timeout = 3600  # 1 hour
         self.admin_credentials = {
@@ -1948,17 +2939,26 @@ class AdminManager:
             'doctor': self._hash_password(os.getenv('DOCTOR_PASSWORD', 'doctor123'))
         }
         self.system_start_time = datetime.now()
+        # (read_at, percent) of the last memory usage reading
+        self._memory_usage = None
+        # In-process assessment counters kept by update_assessment_stats
+        self.analytics_data = {
+            'total_assessments': 0,
+            'assessment_types': Counter(),
+            'daily_stats': defaultdict(lambda: {'assessments': 0, 'sessions': 0})
+        }
     
     def _hash_password(self, password: str) -> str:
-        """Hash password with salt"""
+        """Hash password with salt using scrypt"""
         salt = os.getenv('PASSWORD_SALT', 'psyfind_salt_2024')
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=16384, r=8, p=1).hex()
     
     def authenticate_admin(self, username: str, password: str) -> bool:
         """Authenticate admin user"""
         if username in self.admin_credentials:
             hashed_password = self._hash_password(password)
-            return self.admin_credentials[username] == hashed_password
+            # Constant-time compare so timing doesn't reveal matching prefixes
+            return hmac.compare_digest(self.admin_credentials[username], hashed_password)
         return False
     
     def create_admin_session(self, username: str) -> str:
@@ -1978,19 +2978,25 @@ class AdminManager:
     
     def validate_admin_session(self, session_id: str) -> bool:
         """Validate admin session"""
+        return self.get_valid_admin_session(session_id) is not None
+    
+    def get_valid_admin_session(self, session_id: str) -> Optional[Dict]:
+        """Get the admin session if it is active and not expired, refreshing its activity"""
         session_data = db_manager.get_admin_session(session_id)
         if not session_data:
-            return False
+            return None
         
         # Check if session is expired
-        last_activity = datetime.fromisoformat(session_data['last_activity'])
-        if datetime.now() - last_activity > timedelta(seconds=self.session_timeout):
+        idle = time.time() - session_data['last_activity_epoch']
+        if idle > self.session_timeout:
             db_manager.terminate_admin_session(session_id)
-            return False
+            return None
         
-        # Update last activity
-        db_manager.update_admin_activity(session_id)
-        return True
+        # Update last activity, at most once per ACTIVITY_UPDATE_INTERVAL so
+        # dashboard polling doesn't commit a write on every request
+        if idle >= self.ACTIVITY_UPDATE_INTERVAL:
+            db_manager.update_admin_activity(session_id)
+        return session_data
     
     def get_analytics_data(self) -> Dict:
         """Get comprehensive analytics data"""
@@ -2012,47 +3018,34 @@ class AdminManager:
             }
         }
     
-    def get_active_sessions(self) -> List[Dict]:
-        """Get list of active user sessions"""
-        sessions = db_manager.get_active_sessions()
-        formatted_sessions = []
-        for session in sessions:
-            full_session_id = session['session_id']
-            formatted_sessions.append({
-                'session_id': full_session_id,  # Keep full ID for API calls
-                'display_id': full_session_id[:16] + '...',  # Truncated for display only
-                'created_at': session['created_at'],
-                'last_activity': session['last_activity'],
-                'message_count': session['message_count'],
-                'language': session['language'],
-                'conversation_stage': session['conversation_stage']
-            })
-        return formatted_sessions
+    def get_active_sessions(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Get a page of active user sessions, with the full ID for API calls and a truncated display_id"""
+        return db_manager.get_active_sessions_page(limit, offset)
     
     def terminate_session(self, session_id: str) -> bool:
         """Terminate a user session"""
+        # The dashboard sends full session IDs, which need no lookup
+        if db_manager.mark_session_inactive(session_id):
+            logger.info(f"Admin terminated session: {session_id}")
+            return True
+        
         # Find the full session ID from truncated version
-        sessions = db_manager.get_active_sessions()
-        full_session_id = None
-        for session in sessions:
-            if session['session_id'].startswith(session_id.replace('...', '')):
-                full_session_id = session['session_id']
-                break
+        full_session_id = db_manager.get_session_by_prefix(session_id.replace('...', ''))
         
-        if full_session_id:
-            # Mark session as inactive
-            db_manager.cleanup_expired_sessions(timeout_hours=0)  # Force cleanup
+        if full_session_id and db_manager.mark_session_inactive(full_session_id):
             logger.info(f"Admin terminated session: {full_session_id}")
             return True
         return False
     
     def _get_memory_usage(self) -> float:
-        """Get memory usage percentage"""
-        try:
-            import psutil
-            return psutil.virtual_memory().percent
-        except ImportError:
+        """Get memory usage percentage (reused for MEMORY_USAGE_TTL seconds)"""
+        if psutil is None:
             return 0.0
+        reading = self._memory_usage
+        if reading is None or time.monotonic() - reading[0] >= self.MEMORY_USAGE_TTL:
+            reading = (time.monotonic(), psutil.virtual_memory().percent)
+            self._memory_usage = reading
+        return reading[1]
     
     def _check_llm_status(self) -> str:
         """Check LLM service status"""
@@ -2069,32 +3062,379 @@ class AdminManager:
     def update_assessment_stats(self, assessment_type: str):
         """Update assessment statistics"""
         self.analytics_data['total_assessments'] += 1
-        if assessment_type not in self.analytics_data['assessment_types']:
-            self.analytics_data['assessment_types'][assessment_type] = 0
         self.analytics_data['assessment_types'][assessment_type] += 1
         
         # Update daily stats
-        today = datetime.now().strftime('%Y-%m-%d')
-        if today not in self.analytics_data['daily_stats']:
-            self.analytics_data['daily_stats'][today] = {'assessments': 0, 'sessions': 0}
-        self.analytics_data['daily_stats'][today]['assessments'] += 1
+        self.analytics_data['daily_stats'][time.strftime('%Y-%m-%d')]['assessments'] += 1
+
+def intern_strings(value):
+    """Copy of a parsed JSON value with every string key and value interned"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(key): intern_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(item) for item in value]
+    return value
+
+@lru_cache(maxsize=None)
+def load_dsm_criteria_file(path: str) -> Dict:
+    """Parse a DSM criteria file once per process; callers share the result and must not modify it"""
+    # Read bytes so orjson, when installed, parses without a decode pass
+    with open(path, 'rb') as f:
+        return intern_strings(json_loads(f.read()))
 
 class DSMAnalyzer:
     """DSM-5-TR based psychiatric symptom analyzer"""
     
+    # Questionnaire score cut-offs and the (severity, interpretation) of each
+    # band, lowest first; a score at a cut-off falls in the band above it
+    WHITELEY_THRESHOLDS = (7, 14, 21)
+    WHITELEY_SEVERITIES = (
+        ("minimal", "Minimal health anxiety - within normal range"),
+        ("mild", "Mild health anxiety - minimal hypochondriacal concerns"),
+        ("moderate", "Moderate health anxiety - some hypochondriacal concerns"),
+        ("severe", "High health anxiety - significant hypochondriacal concerns")
+    )
+    PHQ9_THRESHOLDS = (5, 10, 15, 20)
+    PHQ9_SEVERITIES = (
+        ("minimal", "Minimal depression"),
+        ("mild", "Mild depression"),
+        ("moderate", "Moderate depression"),
+        ("moderately_severe", "Moderately severe depression"),
+        ("severe", "Severe depression")
+    )
+    GAD7_THRESHOLDS = (5, 10, 15)
+    GAD7_SEVERITIES = (
+        ("minimal", "Minimal anxiety"),
+        ("mild", "Mild anxiety"),
+        ("moderate", "Moderate anxiety"),
+        ("severe", "Severe anxiety")
+    )
+    ISI_THRESHOLDS = (8, 15, 22)
+    ISI_SEVERITIES = (
+        ("minimal", "No clinically significant insomnia"),
+        ("mild", "Mild insomnia"),
+        ("moderate", "Moderate insomnia"),
+        ("severe", "Severe insomnia")
+    )
+    
+    # Recommendations shared by every questionnaire result, then each
+    # questionnaire's additions by severity
+    SCREENING_RECOMMENDATIONS = (
+        "This assessment is for screening purposes only and does not constitute a medical diagnosis.",
+        "Please consult with a qualified mental health professional for proper evaluation."
+    )
+    
+    WHITELEY_RECOMMENDATIONS = {
+        "severe": (
+            "Your responses suggest significant health anxiety that may benefit from professional treatment.",
+            "Consider cognitive-behavioral therapy (CBT) specifically for health anxiety.",
+            "Mindfulness and relaxation techniques may help manage anxiety symptoms.",
+            "Avoid excessive medical consultations or internet health searches."
+        ),
+        "moderate": (
+            "Your responses indicate moderate health anxiety that could benefit from intervention.",
+            "Consider speaking with a counselor about your health concerns.",
+            "Practice stress management and relaxation techniques.",
+            "Limit health-related internet searches and focus on reliable medical sources."
+        ),
+        "mild": (
+            "Your responses show mild health anxiety, which is manageable with self-care.",
+            "Regular exercise and stress management can help reduce anxiety.",
+            "Maintain regular medical check-ups but avoid excessive health monitoring."
+        ),
+        "minimal": (
+            "Your responses indicate minimal health anxiety, which is within normal range.",
+            "Continue maintaining healthy lifestyle habits.",
+            "Regular medical care as recommended by your healthcare provider is sufficient."
+        )
+    }
+    
+    ISI_RECOMMENDATIONS = {
+        "severe": (
+            "Your responses suggest severe insomnia that significantly impacts your daily functioning.",
+            "Consider consulting a sleep specialist or psychiatrist for evaluation.",
+            "Cognitive Behavioral Therapy for Insomnia (CBT-I) is the recommended first-line treatment.",
+            "Sleep medications may provide short-term relief but should be used under medical supervision."
+        ),
+        "moderate": (
+            "Your responses indicate moderate insomnia that may be affecting your quality of life.",
+            "Consider implementing sleep hygiene practices and relaxation techniques.",
+            "If symptoms persist, consult with a healthcare provider about treatment options.",
+            "CBT-I has been shown to be effective for moderate insomnia."
+        ),
+        "mild": (
+            "Your responses suggest mild insomnia symptoms.",
+            "Try improving sleep hygiene: regular sleep schedule, limiting caffeine, creating a restful environment.",
+            "Relaxation techniques like breathing exercises may help improve sleep quality."
+        ),
+        "minimal": (
+            "Your sleep appears to be within normal ranges.",
+            "Continue maintaining good sleep habits to preserve healthy sleep patterns."
+        )
+    }
+    
+    PHQ9_RECOMMENDATIONS = {
+        "severe": (
+            "Your responses suggest severe depression that requires immediate professional attention.",
+            "Consider contacting a mental health crisis line if you have thoughts of self-harm.",
+            "Seek evaluation for medication and/or psychotherapy.",
+            "Consider cognitive-behavioral therapy (CBT) or interpersonal therapy (IPT)."
+        ),
+        "moderately_severe": (
+            "Your responses indicate moderately severe depression that would benefit from treatment.",
+            "Consider scheduling an appointment with a mental health professional.",
+            "Psychotherapy and/or medication may be helpful.",
+            "Maintain social connections and engage in pleasant activities when possible."
+        ),
+        "moderate": (
+            "Your responses suggest moderate depression that could benefit from intervention.",
+            "Consider counseling or therapy to address your symptoms.",
+            "Regular exercise, good sleep hygiene, and stress management may help.",
+            "Monitor your symptoms and seek help if they worsen."
+        ),
+        "mild": (
+            "Your responses indicate mild depression symptoms.",
+            "Consider lifestyle changes such as regular exercise and stress reduction.",
+            "Monitor your mood and seek professional help if symptoms persist or worsen.",
+            "Maintain social connections and engage in enjoyable activities."
+        )
+    }
+    
+    GAD7_RECOMMENDATIONS = {
+        "severe": (
+            "Your responses suggest severe anxiety that would benefit from professional treatment.",
+            "Consider cognitive-behavioral therapy (CBT) specifically for anxiety disorders.",
+            "Medication may be helpful in combination with therapy.",
+            "Practice relaxation techniques such as deep breathing and mindfulness."
+        ),
+        "moderate": (
+            "Your responses indicate moderate anxiety that could benefit from intervention.",
+            "Consider speaking with a counselor about anxiety management strategies.",
+            "Regular exercise, adequate sleep, and stress reduction techniques may help.",
+            "Limit caffeine and alcohol intake as they can worsen anxiety."
+        ),
+        "mild": (
+            "Your responses show mild anxiety symptoms.",
+            "Practice stress management and relaxation techniques.",
+            "Regular exercise and good sleep hygiene can help reduce anxiety.",
+            "Monitor your symptoms and seek help if they worsen."
+        )
+    }
+    
+    # Fixed DSM-5-TR matches reported by the questionnaire analyzers; each
+    # result is a shallow copy with its confidence filled in
+    DISORDER_TEMPLATES = {
+        "whiteley_illness_anxiety": {
+            "disorder": "Illness Anxiety Disorder",
+            "disorder_zh": "疾病焦慮症",
+            "code": "300.3",
+            "confidence": None,
+            "matched_keywords": ("health anxiety", "somatic concerns", "illness preoccupation"),
+            "matched_keywords_zh": ("健康焦慮", "身體症狀關注", "疾病專注"),
+            "criteria": {
+                "A": "Preoccupation with having or acquiring a serious illness",
+                "B": "Somatic symptoms are not present or mild in intensity",
+                "C": "High level of anxiety about health"
+            }
+        },
+        "whiteley_somatic_symptom": {
+            "disorder": "Somatic Symptom Disorder",
+            "disorder_zh": "身體症狀障礙症",
+            "code": "300.82",
+            "confidence": None,
+            "matched_keywords": ("multiple symptoms", "body awareness", "aches and pains"),
+            "matched_keywords_zh": ("多種症狀", "身體覺察", "疼痛不適"),
+            "criteria": {
+                "A": "One or more somatic symptoms that are distressing",
+                "B": "Excessive thoughts, feelings, or behaviors related to symptoms",
+                "C": "Symptoms persist for more than 6 months"
+            }
+        },
+        "whiteley_generalized_anxiety": {
+            "disorder": "Generalized Anxiety Disorder",
+            "disorder_zh": "廣泛性焦慮症",
+            "code": "300.02",
+            "confidence": None,
+            "matched_keywords": ("excessive worry", "health concerns", "anxiety"),
+            "matched_keywords_zh": ("過度擔憂", "健康關注", "焦慮"),
+            "criteria": {
+                "A": "Excessive anxiety and worry for at least 6 months",
+                "B": "Difficult to control worry",
+                "C": "Associated with physical symptoms"
+            }
+        },
+        "phq9_major_depression": {
+            "disorder": "Major Depressive Disorder",
+            "disorder_zh": "重度憂鬱症",
+            "code": "296.2x",
+            "confidence": None,
+            "matched_keywords": ("depression", "low mood", "anhedonia", "sleep disturbance"),
+            "matched_keywords_zh": ("憂鬱", "情緒低落", "失樂症", "睡眠障礙"),
+            "criteria": {
+                "A": "Five or more symptoms present during 2-week period",
+                "B": "Symptoms cause significant distress or impairment",
+                "C": "Not attributable to substance use or medical condition"
+            }
+        },
+        "phq9_persistent_depression": {
+            "disorder": "Persistent Depressive Disorder",
+            "disorder_zh": "持續性憂鬱症",
+            "code": "300.4",
+            "confidence": None,
+            "matched_keywords": ("chronic depression", "persistent low mood", "dysthymia"),
+            "matched_keywords_zh": ("慢性憂鬱", "持續低落情緒", "輕鬱症"),
+            "criteria": {
+                "A": "Depressed mood for most days for at least 2 years",
+                "B": "Two or more additional symptoms present",
+                "C": "Symptoms cause significant distress or impairment"
+            }
+        },
+        "gad7_generalized_anxiety": {
+            "disorder": "Generalized Anxiety Disorder",
+            "disorder_zh": "廣泛性焦慮症",
+            "code": "300.02",
+            "confidence": None,
+            "matched_keywords": ("anxiety", "worry", "restlessness", "muscle tension"),
+            "matched_keywords_zh": ("焦慮", "擔心", "不安", "肌肉緊張"),
+            "criteria": {
+                "A": "Excessive anxiety and worry for at least 6 months",
+                "B": "Difficult to control the worry",
+                "C": "Associated with physical symptoms"
+            }
+        },
+        "gad7_panic": {
+            "disorder": "Panic Disorder",
+            "disorder_zh": "恐慌症",
+            "code": "300.01",
+            "confidence": None,
+            "matched_keywords": ("panic attacks", "fear", "physical symptoms", "avoidance"),
+            "matched_keywords_zh": ("恐慌發作", "恐懼", "身體症狀", "迴避"),
+            "criteria": {
+                "A": "Recurrent unexpected panic attacks",
+                "B": "Persistent concern about additional attacks",
+                "C": "Significant behavioral changes"
+            }
+        },
+        "isi_insomnia": {
+            "disorder": "Insomnia Disorder",
+            "disorder_zh": "失眠障礙",
+            "code": "307.42",
+            "confidence": None,
+            "matched_keywords": ("difficulty initiating sleep", "difficulty maintaining sleep", "early morning awakening", "sleep dissatisfaction"),
+            "matched_keywords_zh": ("入睡困難", "難以維持睡眠", "早醒", "睡眠不滿意"),
+            "criteria": {
+                "A": "Difficulty initiating or maintaining sleep, or early morning awakening",
+                "B": "Sleep difficulty occurs at least 3 nights per week",
+                "C": "Present for at least 3 months"
+            }
+        }
+    }
+    
+    # Scoring for each questionnaire: highest total, severity bands, and the
+    # DSM-5-TR matches it can report. A score match is
+    # (template, minimum total, scale, offset, cap) and scales linearly from
+    # offset at the minimum to offset + scale at max_score. An item match is
+    # (template, items, scale, cap) and applies when any item scores 3 or more.
+    QUESTIONNAIRES = {
+        "whiteley": {
+            "title": "Whiteley 7 Health Anxiety Assessment",
+            "question_count": 7,
+            "max_score": 28,
+            "thresholds": WHITELEY_THRESHOLDS,
+            "severities": WHITELEY_SEVERITIES,
+            "score_matches": (
+                ("whiteley_illness_anxiety", 14, 100, 50, 95),
+            ),
+            "item_matches": (
+                ("whiteley_somatic_symptom", ("q2", "q6", "q7"), 100, 90),
+                ("whiteley_generalized_anxiety", ("q1",), 80, 85)
+            )
+        },
+        "phq9": {
+            "title": "PHQ-9 Depression Assessment",
+            "question_count": 9,
+            "max_score": 27,
+            "thresholds": PHQ9_THRESHOLDS,
+            "severities": PHQ9_SEVERITIES,
+            "score_matches": (
+                ("phq9_major_depression", 10, 100, 60, 95),
+                ("phq9_persistent_depression", 5, 80, 40, 85)
+            ),
+            "item_matches": ()
+        },
+        "gad7": {
+            "title": "GAD-7 Anxiety Assessment",
+            "question_count": 7,
+            "max_score": 21,
+            "thresholds": GAD7_THRESHOLDS,
+            "severities": GAD7_SEVERITIES,
+            "score_matches": (
+                ("gad7_generalized_anxiety", 10, 100, 70, 95),
+                ("gad7_panic", 8, 85, 50, 90)
+            ),
+            "item_matches": ()
+        },
+        "isi": {
+            "title": "ISI Insomnia Severity Assessment",
+            "question_count": 7,
+            "max_score": 28,
+            "thresholds": ISI_THRESHOLDS,
+            "severities": ISI_SEVERITIES,
+            "score_matches": (
+                ("isi_insomnia", 15, 100, 70, 95),
+            ),
+            "item_matches": ()
+        }
+    }
+    
+    # Terms that count as a specialty match when both the top disorder and a
+    # psychiatrist's subspecialty mention them
+    SPECIALTY_MATCH_KEYWORDS = ("depression", "anxiety", "trauma", "adhd", "bipolar")
+    
     def __init__(self):
         self.dsm_criteria = self.load_dsm_criteria()
+        self._keyword_index = self._build_keyword_index()
         self.psychiatrists = self.load_psychiatrists()
+        self._psychiatrist_index = self._index_psychiatrists()
         
     def load_dsm_criteria(self) -> Dict:
         """Load DSM-5-TR diagnostic criteria"""
         try:
-            with open('assets/dsm5_criteria.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_dsm_criteria_file('assets/dsm5_criteria.json')
         except FileNotFoundError:
             logger.warning("DSM-5-TR criteria file not found, using default criteria")
             return self.get_default_dsm_criteria()
     
+    def _build_keyword_index(self) -> Dict[str, Tuple[Optional[re.Pattern], Dict[str, frozenset], List[Tuple[Dict, List[Tuple[str, str]]]]]]:
+        """Per-language (keyword scanner, keywords contained in each keyword, [(disorder, [(keyword, lowercased)])])"""
+        index = {}
+        for language, field in (('en', 'keywords'), ('zh', 'keywords_zh')):
+            disorders = []
+            for disorder_data in self.dsm_criteria.values():
+                keywords = disorder_data.get(field, [])
+                # Lowercased once here and interned, so keywords shared between
+                # disorders are one string and set lookups can match by identity
+                disorders.append((disorder_data, [(keyword, sys.intern(keyword.lower())) for keyword in keywords]))
+            distinct = list(dict.fromkeys(
+                keyword_lower for _, keywords in disorders for _, keyword_lower in keywords
+            ))
+            
+            # A lookahead tries every position and reports the longest keyword
+            # starting there; any shorter keyword at that position is a
+            # substring of it, so each hit stands for all keywords it contains
+            distinct.sort(key=len, reverse=True)
+            scanner = re.compile(
+                '(?=(' + '|'.join(map(re.escape, distinct)) + '))'
+            ) if distinct else None
+            contained = {
+                keyword: frozenset(other for other in distinct if other in keyword)
+                for keyword in distinct
+            }
+            index[language] = (scanner, contained, disorders)
+        return index
+    
     def load_psychiatrists(self) -> List[Dict]:
         """Load psychiatrist database"""
         try:
@@ -2110,6 +3450,18 @@ class DSMAnalyzer:
             logger.warning("Psychiatrist database not found, using sample data")
             return self.get_sample_psychiatrists()
     
+    def _index_psychiatrists(self) -> List[Tuple[Dict, frozenset, frozenset, str]]:
+        """(psychiatrist, specialty keywords, languages, location) with match fields prepared once at load"""
+        index = []
+        for psychiatrist in self.psychiatrists:
+            specialty_lower = (psychiatrist.get("subspecialty") or "").lower()
+            index.append((
+                psychiatrist,
+                frozenset(keyword for keyword in self.SPECIALTY_MATCH_KEYWORDS if keyword in specialty_lower),
+                frozenset(psychiatrist.get("languages") or ()),
+                (psychiatrist.get("location") or "").lower()))
+        return index
+    
     def get_default_dsm_criteria(self) -> Dict:
         """Default DSM-5-TR criteria for common disorders"""
         return {
@@ -2245,463 +3597,131 @@ class DSMAnalyzer:
                 "languages": ["English", "French"],
                 "location": "Trauma Recovery Center",
                 "phone": "(555) 345-6789",
-                "experience": "18 years",
-                "approach": "EMDR, Somatic Therapies"
-            }
-        ]
-    
-    def analyze_whiteley_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
-        """Analyze Whiteley 7 questionnaire responses"""
-        
-        # Calculate Whiteley 7 total score (0-28)
-        total_score = sum(responses.values())
-        
-        # Interpret Whiteley 7 scores
-        if total_score >= 21:
-            severity = "severe"
-            interpretation = "High health anxiety - significant hypochondriacal concerns"
-        elif total_score >= 14:
-            severity = "moderate"
-            interpretation = "Moderate health anxiety - some hypochondriacal concerns"
-        elif total_score >= 7:
-            severity = "mild"
-            interpretation = "Mild health anxiety - minimal hypochondriacal concerns"
-        else:
-            severity = "minimal"
-            interpretation = "Minimal health anxiety - within normal range"
-        
-        # Generate DSM-5-TR matches based on Whiteley scores
-        matches = []
-        
-        # Health Anxiety/Illness Anxiety Disorder
-        if total_score >= 14:
-            confidence = min(((total_score - 14) / 14) * 100 + 50, 95)
-            matches.append({
-                "disorder": "Illness Anxiety Disorder",
-                "disorder_zh": "疾病焦慮症",
-                "code": "300.3",
-                "confidence": confidence,
-                "matched_keywords": ["health anxiety", "somatic concerns", "illness preoccupation"],
-                "matched_keywords_zh": ["健康焦慮", "身體症狀關注", "疾病專注"],
-                "criteria": {
-                    "A": "Preoccupation with having or acquiring a serious illness",
-                    "B": "Somatic symptoms are not present or mild in intensity",
-                    "C": "High level of anxiety about health"
-                }
-            })
-        
-        # Somatic Symptom Disorder (if high symptom awareness)
-        if responses.get('q2', 0) >= 3 or responses.get('q6', 0) >= 3 or responses.get('q7', 0) >= 3:
-            confidence = min(((responses.get('q2', 0) + responses.get('q6', 0) + responses.get('q7', 0)) / 12) * 100, 90)
-            matches.append({
-                "disorder": "Somatic Symptom Disorder",
-                "disorder_zh": "身體症狀障礙症",
-                "code": "300.82",
-                "confidence": confidence,
-                "matched_keywords": ["multiple symptoms", "body awareness", "aches and pains"],
-                "matched_keywords_zh": ["多種症狀", "身體覺察", "疼痛不適"],
-                "criteria": {
-                    "A": "One or more somatic symptoms that are distressing",
-                    "B": "Excessive thoughts, feelings, or behaviors related to symptoms",
-                    "C": "Symptoms persist for more than 6 months"
-                }
-            })
-        
-        # Generalized Anxiety Disorder (if high worry)
-        if responses.get('q1', 0) >= 3:
-            confidence = min((responses.get('q1', 0) / 4) * 80, 85)
-            matches.append({
-                "disorder": "Generalized Anxiety Disorder",
-                "disorder_zh": "廣泛性焦慮症",
-                "code": "300.02",
-                "confidence": confidence,
-                "matched_keywords": ["excessive worry", "health concerns", "anxiety"],
-                "matched_keywords_zh": ["過度擔憂", "健康關注", "焦慮"],
-                "criteria": {
-                    "A": "Excessive anxiety and worry for at least 6 months",
-                    "B": "Difficult to control worry",
-                    "C": "Associated with physical symptoms"
-                }
-            })
-        
-        # Sort by confidence
-        matches.sort(key=lambda x: x["confidence"], reverse=True)
-        
-        return {
-            "whiteley_score": total_score,
-            "severity": severity,
-            "interpretation": interpretation,
-            "analysis": matches[:3],
-            "recommendations": self.get_whiteley_recommendations(total_score, severity, age)
-        }
-    
-    def get_whiteley_recommendations(self, score: int, severity: str, age: int) -> List[str]:
-        """Generate recommendations based on Whiteley 7 results"""
-        recommendations = [
-            "This assessment is for screening purposes only and does not constitute a medical diagnosis.",
-            "Please consult with a qualified mental health professional for proper evaluation."
+                "experience": "18 years",
+                "approach": "EMDR, Somatic Therapies"
+            }
         ]
-        
-        if severity == "severe":
-            recommendations.extend([
-                "Your responses suggest significant health anxiety that may benefit from professional treatment.",
-                "Consider cognitive-behavioral therapy (CBT) specifically for health anxiety.",
-                "Mindfulness and relaxation techniques may help manage anxiety symptoms.",
-                "Avoid excessive medical consultations or internet health searches."
-            ])
-        elif severity == "moderate":
-            recommendations.extend([
-                "Your responses indicate moderate health anxiety that could benefit from intervention.",
-                "Consider speaking with a counselor about your health concerns.",
-                "Practice stress management and relaxation techniques.",
-                "Limit health-related internet searches and focus on reliable medical sources."
-            ])
-        elif severity == "mild":
-            recommendations.extend([
-                "Your responses show mild health anxiety, which is manageable with self-care.",
-                "Regular exercise and stress management can help reduce anxiety.",
-                "Maintain regular medical check-ups but avoid excessive health monitoring."
-            ])
-        else:
-            recommendations.extend([
-                "Your responses indicate minimal health anxiety, which is within normal range.",
-                "Continue maintaining healthy lifestyle habits.",
-                "Regular medical care as recommended by your healthcare provider is sufficient."
-            ])
-        
-        return recommendations
     
-    def analyze_phq9_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
-        """Analyze PHQ-9 questionnaire responses for depression screening"""
+    def _analyze_questionnaire(self, questionnaire: str, responses: Dict[str, int], age: int) -> Dict:
+        """Score a questionnaire and report its severity, DSM-5-TR matches and recommendations"""
+        config = self.QUESTIONNAIRES[questionnaire]
         
-        # Calculate PHQ-9 total score (0-27)
+        # Calculate total score (0 to max_score)
         total_score = sum(responses.values())
         
-        # Interpret PHQ-9 scores
-        if total_score >= 20:
-            severity = "severe"
-            interpretation = "Severe depression"
-        elif total_score >= 15:
-            severity = "moderately_severe"
-            interpretation = "Moderately severe depression"
-        elif total_score >= 10:
-            severity = "moderate"
-            interpretation = "Moderate depression"
-        elif total_score >= 5:
-            severity = "mild"
-            interpretation = "Mild depression"
-        else:
-            severity = "minimal"
-            interpretation = "Minimal depression"
+        # Interpret the score
+        severity, interpretation = self._score_severity(
+            total_score, config["thresholds"], config["severities"])
         
-        # Generate DSM-5-TR matches based on PHQ-9 scores
+        # Generate DSM-5-TR matches based on the total score and on single items
         matches = []
         
-        if total_score >= 10:
-            confidence = min(((total_score - 10) / 17) * 100 + 60, 95)
-            matches.append({
-                "disorder": "Major Depressive Disorder",
-                "disorder_zh": "重度憂鬱症",
-                "code": "296.2x",
-                "confidence": confidence,
-                "matched_keywords": ["depression", "low mood", "anhedonia", "sleep disturbance"],
-                "matched_keywords_zh": ["憂鬱", "情緒低落", "失樂症", "睡眠障礙"],
-                "criteria": {
-                    "A": "Five or more symptoms present during 2-week period",
-                    "B": "Symptoms cause significant distress or impairment",
-                    "C": "Not attributable to substance use or medical condition"
-                }
-            })
+        for template, minimum, scale, offset, cap in config["score_matches"]:
+            if total_score >= minimum:
+                confidence = min(((total_score - minimum) / (config["max_score"] - minimum)) * scale + offset, cap)
+                matches.append((confidence, template))
         
-        if total_score >= 5:
-            confidence = min(((total_score - 5) / 22) * 80 + 40, 85)
-            matches.append({
-                "disorder": "Persistent Depressive Disorder",
-                "disorder_zh": "持續性憂鬱症",
-                "code": "300.4",
-                "confidence": confidence,
-                "matched_keywords": ["chronic depression", "persistent low mood", "dysthymia"],
-                "matched_keywords_zh": ["慢性憂鬱", "持續低落情緒", "輕鬱症"],
-                "criteria": {
-                    "A": "Depressed mood for most days for at least 2 years",
-                    "B": "Two or more additional symptoms present",
-                    "C": "Symptoms cause significant distress or impairment"
-                }
-            })
+        for template, items, scale, cap in config["item_matches"]:
+            item_scores = [responses.get(item, 0) for item in items]
+            if max(item_scores) >= 3:
+                confidence = min((sum(item_scores) / (4 * len(items))) * scale, cap)
+                matches.append((confidence, template))
         
-        matches.sort(key=lambda x: x["confidence"], reverse=True)
+        # Only copy the templates of the top 3 matches
+        top_matches = heapq.nlargest(3, matches, key=itemgetter(0))
         
         return {
-            "phq9_score": total_score,
+            f"{questionnaire}_score": total_score,
             "severity": severity,
             "interpretation": interpretation,
-            "analysis": matches[:3],
-            "recommendations": self.get_phq9_recommendations(total_score, severity, age)
+            "analysis": [{**self.DISORDER_TEMPLATES[template], "confidence": confidence}
+                         for confidence, template in top_matches],
+            "recommendations": getattr(self, f"get_{questionnaire}_recommendations")(total_score, severity, age)
         }
     
+    def analyze_whiteley_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
+        """Analyze Whiteley 7 questionnaire responses"""
+        return self._analyze_questionnaire("whiteley", responses, age)
+    
+    @staticmethod
+    def _score_severity(total_score: int, thresholds: Tuple[int, ...],
+                        severities: Tuple[Tuple[str, str], ...]) -> Tuple[str, str]:
+        """(severity, interpretation) of the band a questionnaire score falls in"""
+        return severities[bisect.bisect_right(thresholds, total_score)]
+    
+    def get_whiteley_recommendations(self, score: int, severity: str, age: int) -> List[str]:
+        """Generate recommendations based on Whiteley 7 results"""
+        return list(self.SCREENING_RECOMMENDATIONS + self.WHITELEY_RECOMMENDATIONS.get(severity, self.WHITELEY_RECOMMENDATIONS["minimal"]))
+    
+    def analyze_phq9_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
+        """Analyze PHQ-9 questionnaire responses for depression screening"""
+        return self._analyze_questionnaire("phq9", responses, age)
+    
     def analyze_gad7_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
         """Analyze GAD-7 questionnaire responses for anxiety screening"""
-        
-        # Calculate GAD-7 total score (0-21)
-        total_score = sum(responses.values())
-        
-        # Interpret GAD-7 scores
-        if total_score >= 15:
-            severity = "severe"
-            interpretation = "Severe anxiety"
-        elif total_score >= 10:
-            severity = "moderate"
-            interpretation = "Moderate anxiety"
-        elif total_score >= 5:
-            severity = "mild"
-            interpretation = "Mild anxiety"
-        else:
-            severity = "minimal"
-            interpretation = "Minimal anxiety"
-        
-        # Generate DSM-5-TR matches based on GAD-7 scores
-        matches = []
-        
-        if total_score >= 10:
-            confidence = min(((total_score - 10) / 11) * 100 + 70, 95)
-            matches.append({
-                "disorder": "Generalized Anxiety Disorder",
-                "disorder_zh": "廣泛性焦慮症",
-                "code": "300.02",
-                "confidence": confidence,
-                "matched_keywords": ["anxiety", "worry", "restlessness", "muscle tension"],
-                "matched_keywords_zh": ["焦慮", "擔心", "不安", "肌肉緊張"],
-                "criteria": {
-                    "A": "Excessive anxiety and worry for at least 6 months",
-                    "B": "Difficult to control the worry",
-                    "C": "Associated with physical symptoms"
-                }
-            })
-        
-        if total_score >= 8:
-            confidence = min(((total_score - 8) / 13) * 85 + 50, 90)
-            matches.append({
-                "disorder": "Panic Disorder",
-                "disorder_zh": "恐慌症",
-                "code": "300.01",
-                "confidence": confidence,
-                "matched_keywords": ["panic attacks", "fear", "physical symptoms", "avoidance"],
-                "matched_keywords_zh": ["恐慌發作", "恐懼", "身體症狀", "迴避"],
-                "criteria": {
-                    "A": "Recurrent unexpected panic attacks",
-                    "B": "Persistent concern about additional attacks",
-                    "C": "Significant behavioral changes"
-                }
-            })
-        
-        matches.sort(key=lambda x: x["confidence"], reverse=True)
-        
-        return {
-            "gad7_score": total_score,
-            "severity": severity,
-            "interpretation": interpretation,
-            "analysis": matches[:3],
-            "recommendations": self.get_gad7_recommendations(total_score, severity, age)
-        }
+        return self._analyze_questionnaire("gad7", responses, age)
 
     def analyze_isi_responses(self, responses: Dict[str, int], age: int, duration: str) -> Dict:
         """Analyze ISI (Insomnia Severity Index) questionnaire responses"""
-
-        # Calculate ISI total score (0-28)
-        total_score = sum(responses.values())
-
-        # Interpret ISI scores
-        if total_score >= 22:
-            severity = "severe"
-            interpretation = "Severe insomnia"
-        elif total_score >= 15:
-            severity = "moderate"
-            interpretation = "Moderate insomnia"
-        elif total_score >= 8:
-            severity = "mild"
-            interpretation = "Mild insomnia"
-        else:
-            severity = "minimal"
-            interpretation = "No clinically significant insomnia"
-
-        # Generate DSM-5-TR matches based on ISI scores
-        matches = []
-
-        if total_score >= 15:
-            confidence = min(((total_score - 15) / 13) * 100 + 70, 95)
-            matches.append({
-                "disorder": "Insomnia Disorder",
-                "disorder_zh": "失眠障礙",
-                "code": "307.42",
-                "confidence": confidence,
-                "matched_keywords": ["difficulty initiating sleep", "difficulty maintaining sleep", "early morning awakening", "sleep dissatisfaction"],
-                "matched_keywords_zh": ["入睡困難", "難以維持睡眠", "早醒", "睡眠不滿意"],
-                "criteria": {
-                    "A": "Difficulty initiating or maintaining sleep, or early morning awakening",
-                    "B": "Sleep difficulty occurs at least 3 nights per week",
-                    "C": "Present for at least 3 months"
-                }
-            })
-
-        matches.sort(key=lambda x: x["confidence"], reverse=True)
-
-        return {
-            "isi_score": total_score,
-            "severity": severity,
-            "interpretation": interpretation,
-            "analysis": matches[:3],
-            "recommendations": self.get_isi_recommendations(total_score, severity, age)
-        }
+        return self._analyze_questionnaire("isi", responses, age)
 
     def get_isi_recommendations(self, score: int, severity: str, age: int) -> List[str]:
         """Generate recommendations based on ISI results"""
-        recommendations = [
-            "This assessment is for screening purposes only and does not constitute a medical diagnosis.",
-            "Please consult with a qualified mental health professional for proper evaluation."
-        ]
-
-        if severity == "severe":
-            recommendations.extend([
-                "Your responses suggest severe insomnia that significantly impacts your daily functioning.",
-                "Consider consulting a sleep specialist or psychiatrist for evaluation.",
-                "Cognitive Behavioral Therapy for Insomnia (CBT-I) is the recommended first-line treatment.",
-                "Sleep medications may provide short-term relief but should be used under medical supervision."
-            ])
-        elif severity == "moderate":
-            recommendations.extend([
-                "Your responses indicate moderate insomnia that may be affecting your quality of life.",
-                "Consider implementing sleep hygiene practices and relaxation techniques.",
-                "If symptoms persist, consult with a healthcare provider about treatment options.",
-                "CBT-I has been shown to be effective for moderate insomnia."
-            ])
-        elif severity == "mild":
-            recommendations.extend([
-                "Your responses suggest mild insomnia symptoms.",
-                "Try improving sleep hygiene: regular sleep schedule, limiting caffeine, creating a restful environment.",
-                "Relaxation techniques like breathing exercises may help improve sleep quality."
-            ])
-        else:
-            recommendations.extend([
-                "Your sleep appears to be within normal ranges.",
-                "Continue maintaining good sleep habits to preserve healthy sleep patterns."
-            ])
-
-        return recommendations
+        return list(self.SCREENING_RECOMMENDATIONS + self.ISI_RECOMMENDATIONS.get(severity, self.ISI_RECOMMENDATIONS["minimal"]))
 
     def get_phq9_recommendations(self, score: int, severity: str, age: int) -> List[str]:
         """Generate recommendations based on PHQ-9 results"""
-        recommendations = [
-            "This assessment is for screening purposes only and does not constitute a medical diagnosis.",
-            "Please consult with a qualified mental health professional for proper evaluation."
-        ]
-        
-        if severity == "severe":
-            recommendations.extend([
-                "Your responses suggest severe depression that requires immediate professional attention.",
-                "Consider contacting a mental health crisis line if you have thoughts of self-harm.",
-                "Seek evaluation for medication and/or psychotherapy.",
-                "Consider cognitive-behavioral therapy (CBT) or interpersonal therapy (IPT)."
-            ])
-        elif severity == "moderately_severe":
-            recommendations.extend([
-                "Your responses indicate moderately severe depression that would benefit from treatment.",
-                "Consider scheduling an appointment with a mental health professional.",
-                "Psychotherapy and/or medication may be helpful.",
-                "Maintain social connections and engage in pleasant activities when possible."
-            ])
-        elif severity == "moderate":
-            recommendations.extend([
-                "Your responses suggest moderate depression that could benefit from intervention.",
-                "Consider counseling or therapy to address your symptoms.",
-                "Regular exercise, good sleep hygiene, and stress management may help.",
-                "Monitor your symptoms and seek help if they worsen."
-            ])
-        elif severity == "mild":
-            recommendations.extend([
-                "Your responses indicate mild depression symptoms.",
-                "Consider lifestyle changes such as regular exercise and stress reduction.",
-                "Monitor your mood and seek professional help if symptoms persist or worsen.",
-                "Maintain social connections and engage in enjoyable activities."
-            ])
-        
-        return recommendations
+        return list(self.SCREENING_RECOMMENDATIONS + self.PHQ9_RECOMMENDATIONS.get(severity, ()))
     
     def get_gad7_recommendations(self, score: int, severity: str, age: int) -> List[str]:
         """Generate recommendations based on GAD-7 results"""
-        recommendations = [
-            "This assessment is for screening purposes only and does not constitute a medical diagnosis.",
-            "Please consult with a qualified mental health professional for proper evaluation."
-        ]
-        
-        if severity == "severe":
-            recommendations.extend([
-                "Your responses suggest severe anxiety that would benefit from professional treatment.",
-                "Consider cognitive-behavioral therapy (CBT) specifically for anxiety disorders.",
-                "Medication may be helpful in combination with therapy.",
-                "Practice relaxation techniques such as deep breathing and mindfulness."
-            ])
-        elif severity == "moderate":
-            recommendations.extend([
-                "Your responses indicate moderate anxiety that could benefit from intervention.",
-                "Consider speaking with a counselor about anxiety management strategies.",
-                "Regular exercise, adequate sleep, and stress reduction techniques may help.",
-                "Limit caffeine and alcohol intake as they can worsen anxiety."
-            ])
-        elif severity == "mild":
-            recommendations.extend([
-                "Your responses show mild anxiety symptoms.",
-                "Practice stress management and relaxation techniques.",
-                "Regular exercise and good sleep hygiene can help reduce anxiety.",
-                "Monitor your symptoms and seek help if they worsen."
-            ])
-        
-        return recommendations
+        return list(self.SCREENING_RECOMMENDATIONS + self.GAD7_RECOMMENDATIONS.get(severity, ()))
     
     def analyze_symptoms_text(self, symptoms: str, age: int, duration: str, language: str = 'en') -> Dict:
         """Analyze free-text symptoms using expanded DSM-5-TR criteria"""
         symptoms_lower = symptoms.lower()
-        matches = []
+        scored = []
         
-        for disorder_key, disorder_data in self.dsm_criteria.items():
-            score = 0
-            matched_keywords = []
-            
-            # Use appropriate keywords based on language
-            keywords = disorder_data.get("keywords_zh", []) if language == 'zh' else disorder_data.get("keywords", [])
-            
+        # Use appropriate keywords based on language; the text is scanned once
+        # for all of them, however many disorders list each keyword
+        scanner, contained, disorders = self._keyword_index['zh' if language == 'zh' else 'en']
+        hits = {match.group(1) for match in scanner.finditer(symptoms_lower)} if scanner else ()
+        found = frozenset().union(*(contained[keyword] for keyword in hits))
+        
+        for disorder_data, keywords in disorders if found else ():
             # Check for keyword matches
-            for keyword in keywords:
-                if keyword.lower() in symptoms_lower:
-                    score += 1
-                    matched_keywords.append(keyword)
+            matched_keywords = [keyword for keyword, keyword_lower in keywords if keyword_lower in found]
+            score = len(matched_keywords)
             
             if score > 0:
                 confidence = min(score / len(keywords) * 100, 95)
-                
-                # Prepare disorder info with translations
-                disorder_info = {
-                    "disorder": disorder_data["name"],
-                    "code": disorder_data["code"],
-                    "confidence": confidence,
-                    "matched_keywords": matched_keywords,
-                    "criteria": disorder_data["criteria"]
-                }
-                
-                # Add Chinese translations if available
-                if language == 'zh':
-                    disorder_info["disorder_zh"] = disorder_data.get("name_zh", disorder_data["name"])
-                    disorder_info["matched_keywords_zh"] = matched_keywords
-                else:
-                    disorder_info["disorder_zh"] = disorder_data.get("name_zh")
-                    disorder_info["matched_keywords_zh"] = disorder_data.get("keywords_zh", [])[:len(matched_keywords)]
-                
-                matches.append(disorder_info)
+                scored.append((confidence, disorder_data, matched_keywords))
         
-        # Sort by confidence
-        matches.sort(key=lambda x: x["confidence"], reverse=True)
+        # Top 5 by confidence (ties keep criteria order); only these are
+        # turned into result dicts
+        matches = []
+        for confidence, disorder_data, matched_keywords in heapq.nlargest(5, scored, key=itemgetter(0)):
+            # Prepare disorder info with translations
+            disorder_info = {
+                "disorder": disorder_data["name"],
+                "code": disorder_data["code"],
+                "confidence": confidence,
+                "matched_keywords": matched_keywords,
+                "criteria": disorder_data["criteria"]
+            }
+            
+            # Add Chinese translations if available
+            if language == 'zh':
+                disorder_info["disorder_zh"] = disorder_data.get("name_zh", disorder_data["name"])
+                disorder_info["matched_keywords_zh"] = matched_keywords
+            else:
+                disorder_info["disorder_zh"] = disorder_data.get("name_zh")
+                disorder_info["matched_keywords_zh"] = disorder_data.get("keywords_zh", [])[:len(matched_keywords)]
+            
+            matches.append(disorder_info)
         
         return {
-            "analysis": matches[:5],  # Top 5 matches
+            "analysis": matches,
             "recommendations": self.get_recommendations(matches, age)
         }
     
@@ -2739,39 +3759,36 @@ class DSMAnalyzer:
             return self.psychiatrists[:3]  # Return general psychiatrists
         
         top_disorder = analysis["analysis"][0]["disorder"].lower()
-        matched_psychiatrists = []
+        disorder_keywords = frozenset(keyword for keyword in self.SPECIALTY_MATCH_KEYWORDS if keyword in top_disorder)
+        location_lower = location_preference.lower()
+        scored_psychiatrists = []
         
-        for psychiatrist in self.psychiatrists:
+        for psychiatrist, specialty_keywords, languages, psychiatrist_location in self._psychiatrist_index:
             score = 0
             
             # Check specialty match
-            specialty_lower = psychiatrist["subspecialty"].lower()
-            if any(keyword in specialty_lower for keyword in ["depression", "anxiety"] if keyword in top_disorder):
-                score += 3
-            elif "trauma" in top_disorder and "trauma" in specialty_lower:
-                score += 3
-            elif "adhd" in top_disorder and "adhd" in specialty_lower:
-                score += 3
-            elif "bipolar" in top_disorder and "bipolar" in specialty_lower:
+            if not specialty_keywords.isdisjoint(disorder_keywords):
                 score += 3
             
             # Check language preference
-            if language_preference and language_preference in psychiatrist["languages"]:
+            if language_preference and language_preference in languages:
                 score += 2
             
             # Check location preference
-            if location_preference and location_preference.lower() in psychiatrist["location"].lower():
+            if location_lower and location_lower in psychiatrist_location:
                 score += 1
             
-            psychiatrist["match_score"] = score
-            matched_psychiatrists.append(psychiatrist)
+            scored_psychiatrists.append((score, psychiatrist))
         
-        # Sort by match score
-        matched_psychiatrists.sort(key=lambda x: x["match_score"], reverse=True)
-        return matched_psychiatrists[:5]
+        # Keep the 5 best scores without sorting everyone, and score copies so
+        # concurrent requests don't share match scores
+        return [{**psychiatrist, "match_score": score}
+                for score, psychiatrist in heapq.nlargest(5, scored_psychiatrists, key=itemgetter(0))]
 
 # Initialize services
 db_manager = DatabaseManager()
+# Seed doctors from the CSV on the background writer instead of blocking startup
+db_manager.queue_write(db_manager._import_doctors_from_csv)
 llm_service = LLMService()
 analyzer = DSMAnalyzer()
 admin_manager = AdminManager()
@@ -2786,16 +3803,25 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def stream_json_list(key: str, items, encode: Callable[..., str] = json_dumps) -> Response:
+    """Stream {key: [items...]} as JSON without building the list in memory"""
+    def generate():
+        yield f'{{{json_dumps(key)}: ['
+        for index, item in enumerate(items):
+            yield (', ' if index else '') + encode(item)
+        yield ']}'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 def admin_permission_required(permission):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             admin_session_id = session.get('admin_session_id')
-            if not admin_session_id or not admin_manager.validate_admin_session(admin_session_id):
+            admin_session = admin_session_id and admin_manager.get_valid_admin_session(admin_session_id)
+            if not admin_session:
                 return jsonify({"error": "Admin authentication required"}), 401
             
-            admin_session = db_manager.get_admin_session(admin_session_id)
-            if not admin_session or permission not in admin_session.get('permissions', []):
+            if permission not in admin_session.get('permissions', []):
                 return jsonify({"error": "Insufficient permissions"}), 403
             
             return f(*args, **kwargs)
@@ -2897,22 +3923,18 @@ def analyze():
         duration = data.get('duration', '')
         location = data.get('location', '')
         language = data.get('language', 'English')
+        session_id = data.get('session_id', '')
         
         # Extract assessment type and responses
         assessment_type = data.get('assessment_type', 'whiteley')
         
+        # Unknown assessment types are scored as Whiteley
+        questionnaire = assessment_type if assessment_type in analyzer.QUESTIONNAIRES else 'whiteley'
+        config = analyzer.QUESTIONNAIRES[questionnaire]
+        
         # Extract questionnaire responses
         responses = {}
-        question_count = 7  # Default for Whiteley
-
-        if assessment_type == 'phq9':
-            question_count = 9
-        elif assessment_type == 'gad7':
-            question_count = 7
-        elif assessment_type == 'whiteley':
-            question_count = 7
-        elif assessment_type == 'isi':
-            question_count = 7
+        question_count = config["question_count"]
 
         for i in range(1, question_count + 1):
             key = f'q{i}'
@@ -2923,17 +3945,8 @@ def analyze():
             return jsonify({"error": "Please complete all questionnaire items"}), 400
 
         # Analyze responses based on assessment type
-        if assessment_type == 'whiteley':
-            analysis = analyzer.analyze_whiteley_responses(responses, age, duration)
-        elif assessment_type == 'phq9':
-            analysis = analyzer.analyze_phq9_responses(responses, age, duration)
-        elif assessment_type == 'gad7':
-            analysis = analyzer.analyze_gad7_responses(responses, age, duration)
-        elif assessment_type == 'isi':
-            analysis = analyzer.analyze_isi_responses(responses, age, duration)
-        else:
-            # Default to Whiteley
-            analysis = analyzer.analyze_whiteley_responses(responses, age, duration)
+        analysis = getattr(analyzer, f"analyze_{questionnaire}_responses")(responses, age, duration)
+        score = analysis[f"{questionnaire}_score"]
         
         # Find matching psychiatrists
         psychiatrists = analyzer.find_matching_psychiatrists(
@@ -2943,38 +3956,25 @@ def analyze():
         # Generate LLM-powered detailed report
         current_lang = 'zh' if language == 'Traditional Chinese' else 'en'
         
-        # Get chat history for context
-        session_id = data.get('session_id', '')
+        # Get the latest user/assistant messages for context
         chat_history = []
         if session_id:
-            chat_history = db_manager.get_chat_history(session_id)
+            chat_history = db_manager.get_recent_dialog(session_id)
             logger.info(f"Retrieved {len(chat_history)} messages from chat history for session {session_id}")
         
         # Create comprehensive symptom summary including chat context
-        if assessment_type == 'whiteley':
-            assessment_summary = f"Whiteley 7 Health Anxiety Assessment completed. Total score: {analysis['whiteley_score']}/28. Severity: {analysis['severity']}. {analysis['interpretation']}"
-        elif assessment_type == 'phq9':
-            assessment_summary = f"PHQ-9 Depression Assessment completed. Total score: {analysis['phq9_score']}/27. Severity: {analysis['severity']}. {analysis['interpretation']}"
-        elif assessment_type == 'gad7':
-            assessment_summary = f"GAD-7 Anxiety Assessment completed. Total score: {analysis['gad7_score']}/21. Severity: {analysis['severity']}. {analysis['interpretation']}"
-        elif assessment_type == 'isi':
-            assessment_summary = f"ISI Insomnia Severity Assessment completed. Total score: {analysis['isi_score']}/28. Severity: {analysis['severity']}. {analysis['interpretation']}"
+        if questionnaire == assessment_type:
+            assessment_summary = f"{config['title']} completed. Total score: {score}/{config['max_score']}. Severity: {analysis['severity']}. {analysis['interpretation']}"
         else:
             # Generic fallback
             assessment_summary = f"Mental health assessment completed. Severity: {analysis.get('severity', 'unknown')}. {analysis.get('interpretation', 'Assessment results available.')}"
         
         # Combine assessment results with chat context
-        if chat_history and len(chat_history) > 0:
-            # Filter out system messages and format conversation
-            user_messages = [msg for msg in chat_history if msg.get('role') in ['user', 'assistant']]
-            if user_messages:
-                # Format conversation for clinical analysis
-                chat_context = "\n".join([f"{msg['role'].title()}: {msg['content']}" for msg in user_messages[-10:]])  # Last 10 messages
-                symptom_summary = f"{assessment_summary}\n\nPatient Conversation History:\n{chat_context}\n\nPlease incorporate insights from both the assessment scores and the conversation history to provide a comprehensive clinical analysis."
-                logger.info(f"Including {len(user_messages)} chat messages in clinical report for session {session_id}")
-            else:
-                symptom_summary = assessment_summary
-                logger.info(f"No user/assistant messages found in chat history for session {session_id}")
+        if chat_history:
+            # Format conversation for clinical analysis
+            chat_context = "\n".join([f"{REPORT_CHAT_ROLES[msg['role']]}: {msg['content']}" for msg in chat_history])
+            symptom_summary = f"{assessment_summary}\n\nPatient Conversation History:\n{chat_context}\n\nPlease incorporate insights from both the assessment scores and the conversation history to provide a comprehensive clinical analysis."
+            logger.info(f"Including {len(chat_history)} chat messages in clinical report for session {session_id}")
         else:
             symptom_summary = assessment_summary
             logger.info(f"No chat history found for session {session_id}")
@@ -2987,14 +3987,15 @@ def analyze():
         # Create redacted version for frontend (filter out medication recommendations)
         redacted_report = filter_medication_recommendations(unredacted_report, current_lang)
         
-        # Save assessment results to database with unredacted report for admin access
-        session_id = data.get('session_id', '')
+        # Save assessment results to database with unredacted report for admin
+        # access, off the request thread
         if session_id:
-            db_manager.save_assessment_result(
+            db_manager.queue_write(
+                db_manager.save_assessment_result,
                 session_id=session_id,
                 assessment_type=assessment_type,
                 responses=data,
-                score=analysis.get('whiteley_score') or analysis.get('phq9_score') or analysis.get('gad7_score') or analysis.get('isi_score') or 0,
+                score=score,
                 severity=analysis.get('severity', 'unknown'),
                 interpretation=analysis.get('interpretation', ''),
                 dsm_analysis=analysis.get('analysis', []),
@@ -3046,22 +4047,56 @@ def chat():
         if user_message in ["START_CONVERSATION", "FRESH_START_CONVERSATION"]:
             db_manager.log_system_event('session_start', {'language': language}, session_id)
         
-        # Prepare response
-        response = {
-            "message": response_data["message"],
-            "assessment_recommendation": response_data.get("assessment_recommendation", "none"),
-            "conversation_stage": response_data.get("conversation_stage", "support"),
-            "follow_up_questions": response_data.get("follow_up_questions", []),
-            "psychoeducation": response_data.get("psychoeducation", ""),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        return jsonify(response)
+        return jsonify(chat_response_body(response_data))
         
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         return jsonify({"error": "Chat failed. Please try again."}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream an LLM-powered chat reply as server-sent events"""
+    try:
+        data = request.json
+        
+        # Extract chat data
+        session_id = data.get('session_id', 'default')
+        user_message = data.get('message', '')
+        language = data.get('language', 'en')
+        
+        # Validate input
+        if not user_message.strip():
+            return jsonify({"error": "Please provide a message"}), 400
+        
+        # Log session start event
+        if user_message in ["START_CONVERSATION", "FRESH_START_CONVERSATION"]:
+            db_manager.log_system_event('session_start', {'language': language}, session_id)
+        
+        # 'delta' events carry message text as it is generated; the final
+        # 'done' event carries the same body as /chat
+        def generate():
+            for event, payload in llm_service.chat_conversation_stream(session_id, user_message, language):
+                body = chat_response_body(payload) if event == 'done' else {"text": payload}
+                yield f"event: {event}\ndata: {json_dumps(body)}\n\n"
+        
+        return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        
+    except Exception as e:
+        logger.error(f"Chat stream error: {str(e)}")
+        return jsonify({"error": "Chat failed. Please try again."}), 500
+
+def chat_response_body(response_data: Dict) -> Dict:
+    """Client-facing fields of a chat response"""
+    return {
+        "message": response_data["message"],
+        "assessment_recommendation": response_data.get("assessment_recommendation", "none"),
+        "conversation_stage": response_data.get("conversation_stage", "support"),
+        "follow_up_questions": response_data.get("follow_up_questions", []),
+        "psychoeducation": response_data.get("psychoeducation", ""),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -3299,7 +4334,9 @@ def admin_analytics():
 def admin_sessions():
     """Get active sessions"""
     try:
-        sessions = admin_manager.get_active_sessions()
+        limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        sessions = admin_manager.get_active_sessions(limit, offset)
         return jsonify({"sessions": sessions})
     except Exception as e:
         logger.error(f"Admin sessions error: {str(e)}")
@@ -3310,15 +4347,8 @@ def admin_sessions():
 def admin_terminate_session(session_id):
     """Terminate a user session"""
     try:
-        # Find full session ID (since we only show truncated ones)
-        full_session_id = None
-        active_sessions = db_manager.get_active_sessions()
-        for session in active_sessions:
-            if session['session_id'].startswith(session_id.replace('...', '')):
-                full_session_id = session['session_id']
-                break
-        
-        if full_session_id and admin_manager.terminate_session(full_session_id):
+        # Accepts the full ID or the truncated one shown in listings
+        if admin_manager.terminate_session(session_id):
             return jsonify({"success": True})
         else:
             return jsonify({"error": "Session not found"}), 404
@@ -3397,45 +4427,54 @@ def admin_cleanup_sessions():
 def admin_assessments_overview():
     """Get comprehensive assessment overview"""
     try:
-        conn = db_manager.get_connection()
-        
-        # Recent assessments
-        cursor = conn.execute('''
-            SELECT assessment_type, score, severity, created_at, session_id
-            FROM assessment_results 
-            ORDER BY created_at DESC 
-            LIMIT 50
-        ''')
-        recent_assessments = [dict(row) for row in cursor.fetchall()]
-        
-        # Assessment distribution
-        cursor = conn.execute('''
-            SELECT assessment_type, severity, COUNT(*) as count
-            FROM assessment_results 
-            GROUP BY assessment_type, severity
-            ORDER BY assessment_type, severity
-        ''')
-        distribution = [dict(row) for row in cursor.fetchall()]
-        
-        # Daily trends (last 30 days)
-        cursor = conn.execute('''
-            SELECT DATE(created_at) as date, assessment_type, COUNT(*) as count
-            FROM assessment_results 
-            WHERE created_at >= datetime('now', '-30 days')
-            GROUP BY DATE(created_at), assessment_type
-            ORDER BY date DESC
-        ''')
-        daily_trends = [dict(row) for row in cursor.fetchall()]
-        
-        # Average scores by type
-        cursor = conn.execute('''
-            SELECT assessment_type, AVG(score) as avg_score, COUNT(*) as total_count
-            FROM assessment_results 
-            GROUP BY assessment_type
-        ''')
-        avg_scores = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
+        with db_manager.connection() as conn:
+            # Recent assessments
+            cursor = conn.execute('''
+                SELECT assessment_type, score, severity, created_at, session_id
+                FROM assessment_results 
+                ORDER BY created_at DESC 
+                LIMIT 50
+            ''')
+            recent_assessments = rows_to_dicts(cursor)
+            
+            # Assessment distribution, with score sums so average scores by type
+            # come from the same scan
+            cursor = conn.execute('''
+                SELECT assessment_type, severity, COUNT(*) as count,
+                       SUM(score) as score_sum, COUNT(score) as scored_count
+                FROM assessment_results 
+                GROUP BY assessment_type, severity
+                ORDER BY assessment_type, severity
+            ''')
+            distribution = []
+            type_totals = {}
+            for row in cursor:
+                distribution.append({
+                    "assessment_type": row['assessment_type'],
+                    "severity": row['severity'],
+                    "count": row['count']
+                })
+                totals = type_totals.setdefault(row['assessment_type'], [0, 0, 0])
+                totals[0] += row['score_sum'] or 0
+                totals[1] += row['scored_count']
+                totals[2] += row['count']
+            
+            # Daily trends (last 30 days)
+            cursor = conn.execute('''
+                SELECT DATE(created_at) as date, assessment_type, COUNT(*) as count
+                FROM assessment_results 
+                WHERE created_at >= datetime('now', '-30 days')
+                GROUP BY DATE(created_at), assessment_type
+                ORDER BY date DESC
+            ''')
+            daily_trends = rows_to_dicts(cursor)
+            
+            # Average scores by type
+            avg_scores = [{
+                "assessment_type": assessment_type,
+                "avg_score": score_sum / scored_count if scored_count else None,
+                "total_count": total_count
+            } for assessment_type, (score_sum, scored_count, total_count) in type_totals.items()]
         
         return jsonify({
             "recent_assessments": recent_assessments,
@@ -3454,51 +4493,50 @@ def admin_generate_report():
     try:
         data = request.get_json()
         report_type = data.get('type', 'summary')
-        date_range = data.get('date_range', 7)  # days
-        
-        conn = db_manager.get_connection()
+        date_range = int(data.get('date_range', 7))  # days
+        # Bound as a parameter so the statements are reused for every range
+        since = f'-{date_range} days'
         
-        # System summary
-        cursor = conn.execute('''
-            SELECT COUNT(*) as total_sessions FROM user_sessions
-        ''')
-        total_sessions = cursor.fetchone()['total_sessions']
-        
-        cursor = conn.execute('''
-            SELECT COUNT(*) as total_assessments FROM assessment_results
-        ''')
-        total_assessments = cursor.fetchone()['total_assessments']
-        
-        # Recent activity
-        cursor = conn.execute('''
-            SELECT DATE(created_at) as date, COUNT(*) as sessions
-            FROM user_sessions 
-            WHERE created_at >= datetime('now', '-{} days')
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-        '''.format(date_range))
-        session_activity = [dict(row) for row in cursor.fetchall()]
-        
-        cursor = conn.execute('''
-            SELECT DATE(created_at) as date, assessment_type, COUNT(*) as count
-            FROM assessment_results 
-            WHERE created_at >= datetime('now', '-{} days')
-            GROUP BY DATE(created_at), assessment_type
-            ORDER BY date DESC
-        '''.format(date_range))
-        assessment_activity = [dict(row) for row in cursor.fetchall()]
-        
-        # Performance metrics
-        cursor = conn.execute('''
-            SELECT assessment_type, AVG(score) as avg_score, 
-                   MIN(score) as min_score, MAX(score) as max_score
-            FROM assessment_results 
-            WHERE created_at >= datetime('now', '-{} days')
-            GROUP BY assessment_type
-        '''.format(date_range))
-        performance_metrics = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
+        with db_manager.connection() as conn:
+            # System summary
+            cursor = conn.execute('''
+                SELECT COUNT(*) as total_sessions FROM user_sessions
+            ''')
+            total_sessions = cursor.fetchone()['total_sessions']
+            
+            cursor = conn.execute('''
+                SELECT COUNT(*) as total_assessments FROM assessment_results
+            ''')
+            total_assessments = cursor.fetchone()['total_assessments']
+            
+            # Recent activity
+            cursor = conn.execute('''
+                SELECT DATE(created_at) as date, COUNT(*) as sessions
+                FROM user_sessions 
+                WHERE created_at >= datetime('now', ?)
+                GROUP BY DATE(created_at)
+                ORDER BY date DESC
+            ''', (since,))
+            session_activity = rows_to_dicts(cursor)
+            
+            cursor = conn.execute('''
+                SELECT DATE(created_at) as date, assessment_type, COUNT(*) as count
+                FROM assessment_results 
+                WHERE created_at >= datetime('now', ?)
+                GROUP BY DATE(created_at), assessment_type
+                ORDER BY date DESC
+            ''', (since,))
+            assessment_activity = rows_to_dicts(cursor)
+            
+            # Performance metrics
+            cursor = conn.execute('''
+                SELECT assessment_type, AVG(score) as avg_score, 
+                       MIN(score) as min_score, MAX(score) as max_score
+                FROM assessment_results 
+                WHERE created_at >= datetime('now', ?)
+                GROUP BY assessment_type
+            ''', (since,))
+            performance_metrics = rows_to_dicts(cursor)
         
         report = {
             "generated_at": datetime.now().isoformat(),
@@ -3529,29 +4567,25 @@ def admin_system_logs():
         limit = request.args.get('limit', 100, type=int)
         event_type = request.args.get('type', None)
         
-        conn = db_manager.get_connection()
-        
-        query = '''
-            SELECT event_type, event_data, session_id, timestamp
-            FROM system_events 
-        '''
-        params = []
-        
-        if event_type:
-            query += ' WHERE event_type = ?'
-            params.append(event_type)
-        
-        query += ' ORDER BY timestamp DESC LIMIT ?'
-        params.append(limit)
-        
-        cursor = conn.execute(query, params)
-        logs = []
-        for row in cursor.fetchall():
-            log_entry = dict(row)
-            log_entry['event_data'] = json.loads(log_entry['event_data'])
-            logs.append(log_entry)
-        
-        conn.close()
+        db_manager.flush_system_events()
+        with db_manager.connection() as conn:
+            query = '''
+                SELECT event_type, event_data, session_id, timestamp
+                FROM system_events 
+            '''
+            params = []
+            
+            if event_type:
+                query += ' WHERE event_type = ?'
+                params.append(event_type)
+            
+            query += ' ORDER BY timestamp DESC LIMIT ?'
+            params.append(limit)
+            
+            cursor = conn.execute(query, params)
+            logs = rows_to_dicts(cursor)
+            for log_entry in logs:
+                log_entry['event_data'] = json_loads(log_entry['event_data'])
         
         return jsonify({"logs": logs})
     except Exception as e:
@@ -3563,7 +4597,6 @@ def admin_system_logs():
 def admin_create_backup():
     """Create database backup"""
     try:
-        import shutil
         from datetime import datetime
         
         backup_name = f"psyfind_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
@@ -3573,8 +4606,15 @@ def admin_create_backup():
         # Create backups directory if it doesn't exist
         os.makedirs(backup_dir, exist_ok=True)
         
-        # Copy database file
-        shutil.copy2(db_manager.db_path, backup_path)
+        # Copy a consistent snapshot (WAL included) with SQLite's online
+        # backup API, a batch of pages at a time so writers aren't blocked
+        conn = db_manager.get_connection()
+        backup_conn = sqlite3.connect(backup_path)
+        try:
+            conn.backup(backup_conn, pages=1024)
+        finally:
+            backup_conn.close()
+            conn.close()
         
         # Log backup event
         db_manager.log_system_event('backup_created', {'backup_file': backup_name})
@@ -3598,20 +4638,23 @@ def admin_list_backups():
         if not os.path.exists(backup_dir):
             return jsonify({"backups": []})
         
-        backups = []
-        for filename in os.listdir(backup_dir):
-            if filename.endswith('.db'):
-                file_path = os.path.join(backup_dir, filename)
-                file_stat = os.stat(file_path)
-                backups.append({
-                    "filename": filename,
-                    "size": file_stat.st_size,
-                    "created_at": datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
-                    "modified_at": datetime.fromtimestamp(file_stat.st_mtime).isoformat()
-                })
+        # scandir yields names with their directory entries, so each backup
+        # needs only one stat call and no path joins
+        backup_stats = []
+        with os.scandir(backup_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.db'):
+                    backup_stats.append((entry.name, entry.stat()))
         
         # Sort by creation time (newest first)
-        backups.sort(key=lambda x: x['created_at'], reverse=True)
+        backup_stats.sort(key=lambda backup: backup[1].st_ctime, reverse=True)
+        
+        backups = [{
+            "filename": filename,
+            "size": file_stat.st_size,
+            "created_at": datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
+            "modified_at": datetime.fromtimestamp(file_stat.st_mtime).isoformat()
+        } for filename, file_stat in backup_stats]
         
         return jsonify({"backups": backups})
     except Exception as e:
@@ -3662,34 +4705,28 @@ def admin_clinical_sessions():
     try:
         limit = request.args.get('limit', 50, type=int)
         
-        conn = db_manager.get_connection()
-        
-        # Get sessions with assessment data
-        cursor = conn.execute('''
-            SELECT DISTINCT us.session_id, us.created_at, us.last_activity, 
-                   us.language, us.message_count, us.conversation_stage,
-                   COUNT(ar.id) as assessment_count
-            FROM user_sessions us
-            LEFT JOIN assessment_results ar ON us.session_id = ar.session_id
-            WHERE us.is_active = 1 OR ar.id IS NOT NULL
-            GROUP BY us.session_id
-            ORDER BY us.last_activity DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        sessions = []
-        for row in cursor.fetchall():
-            session_data = dict(row)
-            
-            # Get message count from chat_messages table
-            msg_cursor = conn.execute('''
-                SELECT COUNT(*) as msg_count FROM chat_messages WHERE session_id = ?
-            ''', (session_data['session_id'],))
-            session_data['actual_message_count'] = msg_cursor.fetchone()['msg_count']
-            
-            sessions.append(session_data)
-        
-        conn.close()
+        with db_manager.connection() as conn:
+            # Get sessions with assessment data, counting chat messages only for
+            # the sessions on this page
+            cursor = conn.execute('''
+                SELECT page.*,
+                       (SELECT COUNT(*) FROM chat_messages cm
+                        WHERE cm.session_id = page.session_id) as actual_message_count
+                FROM (
+                    SELECT DISTINCT us.session_id, us.created_at, us.last_activity, 
+                           us.language, us.message_count, us.conversation_stage,
+                           COUNT(ar.id) as assessment_count
+                    FROM user_sessions us
+                    LEFT JOIN assessment_results ar ON us.session_id = ar.session_id
+                    WHERE us.is_active = 1 OR ar.id IS NOT NULL
+                    GROUP BY us.session_id
+                    ORDER BY us.last_activity DESC
+                    LIMIT ?
+                ) page
+                ORDER BY page.last_activity DESC
+            ''', (limit,))
+            
+            sessions = rows_to_dicts(cursor)
         
         return jsonify({"sessions": sessions})
     except Exception as e:
@@ -3702,73 +4739,14 @@ def admin_clinical_session_detail(session_id):
     """Get complete clinical data for a session"""
     try:
         logger.info(f"Fetching clinical session details for: {session_id}")
-        conn = db_manager.get_connection()
-
-        # Get session info
-        cursor = conn.execute('''
-            SELECT * FROM user_sessions WHERE session_id = ?
-        ''', (session_id,))
-        session_info = cursor.fetchone()
-
-        if not session_info:
+        detail = db_manager.get_clinical_session_detail(session_id)
+        if detail is None:
             logger.warning(f"Session not found: {session_id}")
-            conn.close()
             return jsonify({"error": "Session not found"}), 404
 
-        session_data = dict(session_info)
+        logger.info(f"Session details fetched: {detail['total_messages']} messages, {detail['total_assessments']} assessments, {detail['total_mood_records']} mood records")
 
-        # Get complete chat history (unfiltered)
-        cursor = conn.execute('''
-            SELECT role, content, timestamp, metadata
-            FROM chat_messages
-            WHERE session_id = ?
-            ORDER BY timestamp ASC
-        ''', (session_id,))
-
-        chat_history = []
-        for row in cursor.fetchall():
-            msg = dict(row)
-            msg['metadata'] = json.loads(msg['metadata'])
-            chat_history.append(msg)
-
-        # Get assessment results with unredacted clinical reports
-        cursor = conn.execute('''
-            SELECT assessment_type, score, severity, interpretation,
-                   dsm_analysis, clinical_report, responses, created_at
-            FROM assessment_results
-            WHERE session_id = ?
-            ORDER BY created_at DESC
-        ''', (session_id,))
-
-        assessments = []
-        for row in cursor.fetchall():
-            assessment = dict(row)
-            assessment['dsm_analysis'] = json.loads(assessment['dsm_analysis'])
-            assessment['responses'] = json.loads(assessment['responses'])
-            assessments.append(assessment)
-
-        # Get mood history
-        cursor = conn.execute('''
-            SELECT mood_type, note, timestamp
-            FROM mood_tracking
-            WHERE session_id = ?
-            ORDER BY timestamp DESC
-        ''', (session_id,))
-        mood_history = [dict(row) for row in cursor.fetchall()]
-
-        conn.close()
-
-        logger.info(f"Session details fetched: {len(chat_history)} messages, {len(assessments)} assessments, {len(mood_history)} mood records")
-
-        return jsonify({
-            "session": session_data,
-            "chat_history": chat_history,
-            "assessments": assessments,
-            "mood_history": mood_history,
-            "total_messages": len(chat_history),
-            "total_assessments": len(assessments),
-            "total_mood_records": len(mood_history)
-        })
+        return jsonify(detail)
         
     except Exception as e:
         logger.error(f"Clinical session detail error: {str(e)}")
@@ -3782,35 +4760,9 @@ def admin_clinical_reports():
         limit = request.args.get('limit', 100, type=int)
         assessment_type = request.args.get('type', None)
         
-        conn = db_manager.get_connection()
-        
-        query = '''
-            SELECT ar.*, us.language, us.created_at as session_created
-            FROM assessment_results ar
-            JOIN user_sessions us ON ar.session_id = us.session_id
-        '''
-        params = []
-        
-        if assessment_type:
-            query += ' WHERE ar.assessment_type = ?'
-            params.append(assessment_type)
-        
-        query += ' ORDER BY ar.created_at DESC LIMIT ?'
-        params.append(limit)
-        
-        cursor = conn.execute(query, params)
-        
-        reports = []
-        for row in cursor.fetchall():
-            report = dict(row)
-            report['dsm_analysis'] = json.loads(report['dsm_analysis'])
-            report['responses'] = json.loads(report['responses'])
-            # clinical_report contains unredacted version
-            reports.append(report)
-        
-        conn.close()
-        
-        return jsonify({"reports": reports})
+        # clinical_report contains unredacted version
+        reports = db_manager.iter_clinical_reports_json(assessment_type, limit)
+        return stream_json_list("reports", reports, encode=str)
         
     except Exception as e:
         logger.error(f"Clinical reports error: {str(e)}")
@@ -3821,25 +4773,25 @@ def admin_clinical_reports():
 def admin_export_clinical_data(session_id):
     """Export complete clinical data for a session"""
     try:
-        # Get complete session data
-        response = admin_clinical_session_detail(session_id)
-        if response.status_code != 200:
-            return response
-        
-        session_data = response.get_json()
+        # Get the session summary; the chat history is streamed
+        export = db_manager.iter_clinical_export(session_id)
+        if export is None:
+            return jsonify({"error": "Session not found"}), 404
+        session_data, chat_history = export
         
         # Create comprehensive clinical export
-        export_data = {
+        head = {
             "export_timestamp": datetime.now().isoformat(),
             "session_id": session_id,
-            "session_info": session_data["session_info"],
+            "session_info": session_data["session"],
             "clinical_summary": {
                 "total_messages": session_data["total_messages"],
                 "total_assessments": session_data["total_assessments"],
-                "conversation_duration": session_data["session_info"]["last_activity"],
-                "language": session_data["session_info"]["language"]
-            },
-            "complete_chat_history": session_data["chat_history"],
+                "conversation_duration": session_data["session"]["last_activity"],
+                "language": session_data["session"]["language"]
+            }
+        }
+        tail = {
             "assessment_results": session_data["assessments"],
             "admin_notes": "Complete clinical record with unredacted medication recommendations"
         }
@@ -3851,7 +4803,14 @@ def admin_export_clinical_data(session_id):
             'export_type': 'complete_clinical_record'
         }, session_id)
         
-        return jsonify(export_data)
+        # Long sessions are encoded message by message instead of as one blob
+        def generate():
+            yield json_dumps(head)[:-1] + ', "complete_chat_history": ['
+            for index, message in enumerate(chat_history):
+                yield (', ' if index else '') + json_dumps(message)
+            yield '], ' + json_dumps(tail)[1:]
+        
+        return Response(stream_with_context(generate()), mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Clinical export error: {str(e)}")
@@ -3866,8 +4825,15 @@ def admin_get_doctors():
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         limit = request.args.get('limit', type=int)
         
-        doctors = db_manager.get_doctors(active_only=active_only, limit=limit)
-        return jsonify({"doctors": doctors})
+        # The active list is small and cached (serialized, when complete);
+        # the full history is streamed
+        if active_only and not limit:
+            return Response(db_manager.get_active_doctors_json(), mimetype='application/json')
+        if active_only:
+            doctors = db_manager.get_doctors(active_only=True, limit=limit)
+        else:
+            doctors = db_manager.iter_doctors(active_only=False, limit=limit)
+        return stream_json_list("doctors", doctors)
     except Exception as e:
         logger.error(f"Get doctors error: {str(e)}")
         return jsonify({"error": "Failed to fetch doctors"}), 500
@@ -3965,10 +4931,10 @@ def admin_search_doctors():
     """Search doctors"""
     try:
         query = request.args.get('q', '')
-        specialty = request.args.get('specialty', None)
-        
         if not query:
-            return jsonify({"doctors": []})
+            return Response(EMPTY_DOCTORS_JSON, mimetype='application/json')
+        
+        specialty = request.args.get('specialty', None)
         
         doctors = db_manager.search_doctors(query, specialty)
         return jsonify({"doctors": doctors})
@@ -3980,11 +4946,8 @@ if __name__ == '__main__':
     # Create assets directory if it doesn't exist
     os.makedirs('assets', exist_ok=True)
     
-    # Import doctors from CSV after database is ready
-    try:
-        db_manager._import_doctors_from_csv()
-    except Exception as e:
-        logger.error(f"Error during CSV import: {str(e)}")
-    
-    # Run the app
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; deployments run app:app under gunicorn's
+    # gthread workers. Debug mode (reloader, debugger) is opt-in.
+    debug = (os.getenv('FLASK_DEBUG', 'False').lower() in ('1', 'true')
+             or os.getenv('FLASK_ENV') == 'development')
+    app.run(debug=debug, host='0.0.0.0', port=5000, threaded=True)
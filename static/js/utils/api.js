@@ -91,6 +91,67 @@ const API = (function() {
         method: 'POST',
         body: JSON.stringify({ session_id: sessionId, message, language })
       });
+    },
+
+    /**
+     * Send a message and stream the reply as it is generated
+     * @param {string} sessionId - Session ID
+     * @param {string} message - User message
+     * @param {string} language - Language code
+     * @param {Function} onDelta - Called with each piece of message text
+     * @returns {Promise} Assistant response, as returned by sendMessage
+     */
+    async streamMessage(sessionId, message, language = 'en', onDelta = () => {}) {
+      let response;
+      try {
+        response = await fetch(`${BASE_URL}/chat/stream`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+          },
+          body: JSON.stringify({ session_id: sessionId, message, language })
+        });
+      } catch (error) {
+        throw new APIError(error.message || 'Network error', 0);
+      }
+
+      if (!response.ok) {
+        const error = await response.json().catch(() => ({}));
+        throw new APIError(
+          error.message || `HTTP ${response.status}: ${response.statusText}`,
+          response.status,
+          error
+        );
+      }
+
+      // Server-sent events are separated by a blank line
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          const event = (block.match(/^event: (.*)$/m) || [])[1];
+          const data = (block.match(/^data: (.*)$/m) || [])[1];
+          if (!data) continue;
+
+          if (event === 'delta') {
+            onDelta(JSON.parse(data).text);
+          } else if (event === 'done') {
+            return JSON.parse(data);
+          }
+        }
+      }
+
+      throw new APIError('Stream ended before the response completed', 0);
     }
   };
 
@@ -253,11 +314,13 @@ const API = (function() {
     },
 
     /**
-     * Get active sessions
+     * Get active sessions, most recently active first
+     * @param {number} limit - Page size (server caps it at 500)
+     * @param {number} offset - Sessions to skip
      * @returns {Promise} List of active sessions
      */
-    async getSessions() {
-      return request('/admin/api/sessions');
+    async getSessions(limit = 100, offset = 0) {
+      return request(`/admin/api/sessions?limit=${limit}&offset=${offset}`);
     },
 
     /**